@@ -2,18 +2,67 @@
 LLM-based agents for site discovery, query enhancement, and data extraction.
 """
 
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
 import json
+import logging
 import re
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Set, Tuple, Type
 
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError, model_validator
+from langchain_core.messages import BaseMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_google_vertexai import ChatVertexAI
 
+from app.agents.llm_cache import async_lru
+from app.agents.site_config import get_static_sites
 from app.config import settings
+from app.core.cache import cache_country_sites, cache_enhanced_query, get_country_sites, get_enhanced_query
 from app.models import ProductResult
-from app.utils.html_cleaner import preprocess_html_for_llm
-from app.utils.rate_limiter import gemini_rate_limiter, get_static_sites
+from app.utils.html_cleaner import prepare_html_for_llm
+from app.utils.json_ld import extract_json_ld_product
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.process_pool import get_process_pool
+from app.utils.rate_limiter import gemini_rate_limiter
+from app.utils.semantic_cache import semantic_get, semantic_set
+from app.utils.single_flight import single_flight
+from app.utils.token_truncate import CHARS_PER_TOKEN, estimate_tokens, truncate_to_tokens
+from app.utils.ttl_cache import TTLCache
+
+log = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-2.5-flash"
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Extraction validation patterns, compiled once
+_SKIP_PHRASES_RE = re.compile(r'about us|contact|search results|customers also bought|page not found|error|404|recommendations|related products')
+_ERROR_PAGE_RE = re.compile(r'error|not found|page')
+_STOP_WORDS = frozenset({'the', 'and', 'for', 'with', 'buy', 'get'})
+
+# Pre-flight checks that rule out a page before spending an LLM call on it
+_PRICE_PRESENT_RE = re.compile(r'[$£€₹¥]\s*\d|\b(?:USD|GBP|EUR|INR|CAD|AUD)\b|\[PRICE HINT\]')
+_DEAD_PAGE_RE = re.compile(r'page not found|404 not found|error 404|access denied|select your country|country selection', re.I)
+
+# Markers placed by preprocess_html_for_llm around product titles and prices
+_WINDOW_MARKER_RE = re.compile(r'\[(?:MAIN PRODUCT TITLE|PRODUCT TITLE|PRICE HINT|PRICE CANDIDATE)\]')
+
+# Query enhancement skip rules
+_KNOWN_BRANDS = ('iphone', 'samsung', 'sony', 'apple', 'google')
+_SPEC_MARKERS = ('gb', 'pro', 'max', 'plus', 'mini')
+
+
+@functools.lru_cache(maxsize=1024)
+def _significant_words_re(search_query: str) -> Optional[re.Pattern]:
+    """Compile the significant words of a query into one alternation pattern (None if there are none)."""
+    words = [w for w in search_query.lower().split() if len(w) > 2 and w not in _STOP_WORDS]
+    if not words:
+        return None
+    return re.compile('|'.join(map(re.escape, words)))
 
 
 class ProductInfoTool(BaseModel):
@@ -24,143 +73,203 @@ class ProductInfoTool(BaseModel):
     availability: str = Field(description="Availability status, e.g., 'in-stock', 'out-of-stock'.")
 
 
+class PageProductInfo(ProductInfoTool):
+    """Structured product information for one page of a multi-page request."""
+    page: int = Field(description="The number of the PAGE block the product was found on.")
+
+
+class SiteRef(BaseModel):
+    """An e-commerce site to search."""
+    domain: str = Field(description="The site's domain, e.g. 'amazon.com'.")
+    base_url: str = Field(description="The site's homepage URL, e.g. 'https://www.amazon.com'.")
+
+
+class SitesAndQuery(BaseModel):
+    """A tool to return the retailer sites to search and the optimized search query together."""
+    enhanced_query: str = Field(description="The optimized search query.")
+    sites: List[SiteRef] = Field(description="The top e-commerce sites for the target country.")
+
+
+class ProductInfoBatchTool(BaseModel):
+    """A tool to extract structured product information from several pages of HTML text."""
+    products: List[PageProductInfo] = Field(description="One entry per page where the main product was found.")
+    # PAGE numbers of entries dropped as invalid (None when the entry had no usable page number)
+    _rejected_pages: Set[Optional[int]] = PrivateAttr(default_factory=set)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _drop_invalid_products(cls, data: Any, handler) -> "ProductInfoBatchTool":
+        """Validate entries one at a time, so one malformed page doesn't discard the rest of the batch."""
+        rejected = set()
+        if isinstance(data, dict) and isinstance(data.get("products"), list):
+            valid = []
+            for product in data["products"]:
+                try:
+                    valid.append(PageProductInfo.model_validate(product))
+                except ValidationError as e:
+                    page = product.get("page") if isinstance(product, dict) else None
+                    rejected.add(page if isinstance(page, int) else None)
+                    log.warning("Dropping invalid batch extraction entry: %s", e.errors(include_url=False))
+            data = {**data, "products": valid}
+
+        batch = handler(data)
+        batch._rejected_pages = rejected
+        return batch
+
+
 # Initialize LLM instances - prefer Google AI Studio over Vertex AI
+# Both factories are memoized so module reloads and tests never rebuild the client or tool schema
+@functools.lru_cache(maxsize=1)
 def _get_llm():
     """Get the appropriate LLM instance based on available credentials."""
     if settings.GOOGLE_AI_API_KEY:
-        print("🤖 Using Google AI Studio (Gemini 2.5 Flash)")
+        log.info("🤖 Using Google AI Studio (Gemini 2.5 Flash)")
         return ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
+            model=MODEL_NAME,
             google_api_key=settings.GOOGLE_AI_API_KEY,
             temperature=0
         )
     elif settings.GOOGLE_APPLICATION_CREDENTIALS:
-        print("🤖 Using Vertex AI (Gemini 2.5 Flash)")
+        log.info("🤖 Using Vertex AI (Gemini 2.5 Flash)")
+        # Every prompt here has a short, structured answer: skip thinking and cap decode length
         return ChatVertexAI(
-            model_name="gemini-2.5-flash",
-            temperature=0
+            model_name=MODEL_NAME,
+            temperature=0,
+            thinking_budget=0,
+            max_output_tokens=settings.LLM_MAX_OUTPUT_TOKENS
         )
     else:
         raise ValueError("No Google AI credentials available. Set GOOGLE_AI_API_KEY or GOOGLE_APPLICATION_CREDENTIALS.")
 
 _llm = _get_llm()
 
-# Configure structured output based on LLM type
+# Bind the extraction schemas as native Gemini tools. Calls are not forced, so the model can
+# decline to call the tool when the page shows no matching product. The bindings wrap the shared
+# _llm client (and its gRPC channel); always reuse them rather than rebinding per call
+@functools.lru_cache(maxsize=1)
 def _get_tool_llm():
-    """Get LLM configured for structured output."""
-    if settings.GOOGLE_AI_API_KEY:
-        # Google AI Studio doesn't support method parameter
-        return _llm.with_structured_output(ProductInfoTool)
-    else:
-        # Vertex AI supports method parameter
-        return _llm.with_structured_output(ProductInfoTool, method="tool_calling")
+    """Get LLM with the single-page extraction tool bound."""
+    return _get_llm().bind_tools([ProductInfoTool])
 
 _tool_llm = _get_tool_llm()
 
+@functools.lru_cache(maxsize=1)
+def _get_batch_tool_llm():
+    """Get LLM with the multi-page extraction tool bound."""
+    return _get_llm().bind_tools([ProductInfoBatchTool])
 
-async def discover_sites(country: str) -> List[Dict]:
+_batch_tool_llm = _get_batch_tool_llm()
+
+@functools.lru_cache(maxsize=1)
+def _get_bootstrap_llm():
+    """Get LLM with the combined site discovery and query enhancement tool bound."""
+    return _get_llm().bind_tools([SitesAndQuery])
+
+_bootstrap_llm = _get_bootstrap_llm()
+
+# Exact-match response cache: identical prompts are answered from memory instead of Gemini
+_llm_cache = TTLCache(maxsize=settings.LLM_CACHE_MAX_SIZE, ttl=settings.LLM_CACHE_TTL_SECONDS)
+_MISSING = object()
+
+
+async def _cached_invoke(llm, prompt: str, tag: str, schema: Optional[Type[BaseModel]] = None) -> Any:
     """
-    Agent: Discover sites using static cache (to save LLM calls) or LLM fallback.
+    Invoke an LLM through the exact-match response cache.
+
+    The rate limiter is only consumed on a cache miss, and concurrent misses for the same
+    prompt share a single Gemini call. Chat responses are stored as their text content;
+    tool-calling responses are stored as the parsed tool arguments.
 
     Args:
-        country: Country code to discover sites for
+        llm: LLM runnable to invoke on a miss
+        prompt: Fully rendered prompt
+        tag: Call-site name, keeps identical prompts from different agents apart
+        schema: Tool schema bound to llm; when given, the first call to it is parsed and returned
 
     Returns:
-        List of site dictionaries with 'domain' and 'base_url' keys
+        Response text for chat calls, parsed schema instance (or None if the tool wasn't called) for tool calls
     """
-    # Use static cache first to save LLM calls (Gemini free tier: 10 req/min)
-    if settings.ENABLE_STATIC_SITE_CACHE:
-        static_sites = get_static_sites(country)
-        if static_sites:
-            print(f"🏪 Using static site cache for {country} ({len(static_sites)} sites)")
-            return static_sites
-
-    # Fallback to LLM discovery if no static cache
-    print(f"🤖 Using LLM site discovery for {country} (consuming rate limit)")
-    await gemini_rate_limiter.acquire()
+    key = hashlib.sha256(f"{MODEL_NAME}|{tag}|{prompt}".encode()).hexdigest()
+    cached = _llm_cache.get(key, _MISSING)
+    if cached is not _MISSING:
+        log.info("⚡ LLM cache hit for %s", tag)
+        return cached
 
-    prompt = f"""You are an e-commerce expert. Identify the top 8-10 most popular e-commerce websites for buying new consumer electronics in the country with code '{country}'.
+    async def invoke():
+        await gemini_rate_limiter.acquire()
+        response = await llm.ainvoke(prompt)
+        value = response.content if schema is None else _parse_tool_call(response, schema)
+        _llm_cache.set(key, value)
+        return value
 
-Include major retailers, electronics stores, department stores, and mobile carrier stores.
-For {country}, include both international sites (like Amazon) and major local retailers.
+    return await single_flight(key, invoke)
 
-Return ONLY a JSON list of objects, each with a 'domain' and 'base_url' key.
-Example: [{{"domain": "amazon.com", "base_url": "https://www.amazon.com"}}, {{"domain": "bestbuy.com", "base_url": "https://www.bestbuy.com"}}]"""
 
-    response = await _llm.ainvoke(prompt)
-    try:
-        match = re.search(r'\[.*\]', response.content, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-        return []
-    except (json.JSONDecodeError, TypeError):
-        return []
+def _parse_tool_call(message: BaseMessage, schema: Type[BaseModel]) -> Optional[BaseModel]:
+    """Validate the arguments of the first call to schema's tool, or None if the model didn't call it."""
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        if tool_call["name"] == schema.__name__:
+            return schema.model_validate(tool_call["args"])
+    return None
 
 
-async def enhance_query(query: str, country: str) -> str:
+async def warmup():
     """
-    Agent: Enhance user query for better search results (with rate limiting).
-
-    Args:
-        query: Original user query
-        country: Target country code
+    Open the Gemini channel and complete auth before the first user request.
 
-    Returns:
-        Enhanced query string
+    Sends one tiny prompt (it counts against the rate limit); failures are logged and ignored.
     """
-    # Simple enhancement rules to avoid LLM call for common cases
-    query_lower = query.lower()
+    try:
+        await gemini_rate_limiter.acquire()
+        await _llm.ainvoke("Reply with OK.")
+        log.info("🔥 Gemini client warmed up")
+    except Exception as e:
+        log.warning("Gemini warmup failed: %s", e)
 
-    # If query is already well-formed, skip LLM enhancement
-    if any(brand in query_lower for brand in ['iphone', 'samsung', 'sony', 'apple', 'google']):
-        if any(spec in query_lower for spec in ['gb', 'pro', 'max', 'plus', 'mini']):
-            print(f"📝 Query '{query}' is already well-formed, skipping LLM enhancement")
-            return query
 
-    # Use LLM for complex queries
-    print(f"🤖 Using LLM query enhancement (consuming rate limit)")
-    await gemini_rate_limiter.acquire()
+def get_llm_cache_stats() -> Dict[str, int]:
+    """Get hit/miss statistics for the LLM response cache."""
+    return _llm_cache.stats()
 
-    prompt = f"""You are a search optimization expert. Transform the user's query into an optimized search term for e-commerce sites.
-Original query: "{query}"
-Target country: {country}
-Return ONLY the enhanced query string, no explanation."""
 
-    response = await _llm.ainvoke(prompt)
-    return response.content.strip().strip('"\'')
+# Static prompt text is kept byte-identical across calls and placed before any per-call
+# values, so Gemini's implicit prefix caching can skip prefill on it.
+SITE_DISCOVERY_PROMPT = """You are an e-commerce expert. Identify the top 8-10 most popular e-commerce websites for buying new consumer electronics in the country given at the end.
 
+Include major retailers, electronics stores, department stores, and mobile carrier stores.
+Include both international sites (like Amazon) and major local retailers.
 
-async def extract_from_html(raw_html: str, site_name: str, search_query: str = "") -> Optional[ProductResult]:
-    """
-    Agent: Tier 2 Extraction using preprocessed HTML and query-aware prompting.
+Return ONLY a JSON list of objects, each with a 'domain' and 'base_url' key.
+Example: [{"domain": "amazon.com", "base_url": "https://www.amazon.com"}, {"domain": "bestbuy.com", "base_url": "https://www.bestbuy.com"}]
 
-    Args:
-        raw_html: Raw HTML content to extract from
-        site_name: Name of the site being scraped
-        search_query: The original search query to help validate extraction
+Country code: """
 
-    Returns:
-        ProductResult if extraction successful, None otherwise
-    """
-    # Preprocess the HTML first!
-    cleaned_html = preprocess_html_for_llm(raw_html)
+ENHANCE_QUERY_PROMPT = """You are a search optimization expert. Transform the user's query into an optimized search term for e-commerce sites.
+Return ONLY the enhanced query string, no explanation.
+"""
 
-    if not cleaned_html.strip():
-        print(f"HTML for {site_name} was empty after cleaning. Skipping LLM call.")
-        return None
+BOOTSTRAP_PROMPT = """You are an e-commerce and search optimization expert. Two tasks for the target country and query given at the end:
+1. Identify the top 8-10 most popular e-commerce websites for buying new consumer electronics in that country.
+   Include major retailers, electronics stores, department stores, and mobile carrier stores.
+   Include both international sites (like Amazon) and major local retailers.
+   Give each as a 'domain' (e.g. "amazon.com") and a 'base_url' (e.g. "https://www.amazon.com").
+2. Transform the user's query into an optimized search term for e-commerce sites.
+
+Return both by calling the tool once.
+"""
 
-    # Enhanced anti-hallucination prompt
-    prompt = f"""You are extracting product information from a webpage on '{site_name}'. You MUST ONLY use information that is explicitly present in the provided HTML content below.
+EXTRACT_PROMPT_PREFIX = """You are extracting product information from an e-commerce webpage. The site, the search query and the HTML content are given at the end. You MUST ONLY use information that is explicitly present in that HTML content.
 
 **CRITICAL ANTI-HALLUCINATION RULES:**
-1. **ONLY extract information that is literally present in the HTML content below**
+1. **ONLY extract information that is literally present in the HTML content at the end**
 2. **DO NOT use your training data or general knowledge about products or prices**
 3. **If you cannot find clear price information in the HTML, DO NOT call the tool**
-4. **The product must match the search query "{search_query}" AND be present in the HTML**
+4. **The product must match the SEARCH QUERY AND be present in the HTML**
 5. **Look for `[MAIN PRODUCT TITLE]` and `[PRICE HINT]` markers in the content**
+6. **The content is either page text with markers, or a JSON object whose keys are XPaths and whose values are page text; in JSON form, every extracted value must appear in one of the JSON values (an `h1` key usually holds the main product title)**
 
 **VALIDATION RULES:**
-- Product name must be relevant to the search query "{search_query}"
+- Product name must be relevant to the SEARCH QUERY
 - Price must be reasonable (not $0.00 or extremely high)
 - Ignore any text about "related products", "recommendations", "also bought"
 
@@ -208,50 +317,416 @@ Extract: Price = 999.99 (use "Full retail price", ignore promotional "$0.00/mo")
 Search: "Samsung Galaxy S24"
 Content: `Starting at $1199.99\\n256GB model: $1299.99\\n512GB model: $1399.99`
 DO NOT extract: Price = 1299.99 (this is a higher variant, use "Starting at" instead)
+"""
 
-**HTML CONTENT TO ANALYZE:**
----
-{cleaned_html[:8000]}
----
-
-**FINAL INSTRUCTION:** Extract the main product information ONLY if:
+EXTRACT_PROMPT_SUFFIX = """**FINAL INSTRUCTION:** Extract the main product information ONLY if:
 1. You can clearly see the product name in the HTML content above
 2. You can clearly see the price in the HTML content above
-3. The product matches "{search_query}"
+3. The product matches the SEARCH QUERY
 
 If any of these conditions are not met, DO NOT call the tool. Do not guess or use external knowledge."""
 
+EXTRACT_BATCH_PROMPT_SUFFIX = """**FINAL INSTRUCTION:** Each PAGE block above is a separate product page with its own SITE and SEARCH QUERY.
+Apply every rule above to each page independently - never combine a title from one page with a price from another.
+Call the tool once, with one entry (including its PAGE number) for each page where:
+1. You can clearly see the product name in that page's HTML content
+2. You can clearly see the price in that page's HTML content
+3. The product matches that page's SEARCH QUERY
+
+Leave out pages where any of these conditions are not met. Do not guess or use external knowledge."""
+
+
+async def discover_sites(country: str) -> List[Dict]:
+    """
+    Agent: Discover sites using static cache (to save LLM calls) or LLM fallback.
+
+    Args:
+        country: Country code to discover sites for
+
+    Returns:
+        List of site dictionaries with 'domain' and 'base_url' keys
+    """
+    country = _normalize_country(country)
+    sites = await _lookup_sites(country)
+    if sites is not None:
+        return sites
+    return await _discover_sites_llm(country)
+
+
+def _normalize_country(country: str) -> str:
+    """Canonical country code, so "us", " US" and "US" share every cache entry."""
+    return country.strip().upper()
+
+
+async def _lookup_sites(country: str) -> Optional[List[Dict]]:
+    """Sites for a country from the static or persisted caches, or None if the LLM is needed."""
+    # Use static cache first to save LLM calls (Gemini free tier: 10 req/min)
+    if settings.ENABLE_STATIC_SITE_CACHE:
+        static_sites = get_static_sites(country)
+        if static_sites:
+            log.info("🏪 Using static site cache for %s (%d sites)", country, len(static_sites))
+            return static_sites
+
+    # Then the persistent cache of earlier LLM discoveries
+    cached_sites = await get_country_sites(country)
+    if cached_sites:
+        log.info("💾 Using persisted site discovery for %s (%d sites)", country, len(cached_sites))
+        return cached_sites
+    return None
+
+
+async def _discover_sites_llm(country: str) -> List[Dict]:
+    """Discover sites for a country with the LLM and persist a non-empty result."""
+    # Fallback to LLM discovery if no static cache
+    log.info("🤖 Using LLM site discovery for %s", country)
+
+    prompt = f"{SITE_DISCOVERY_PROMPT}{country}"
+
+    content = await _cached_invoke(_llm, prompt, "discover_sites")
+    # Parse the outermost JSON array with orjson; if prose after it contains a ']', fall back
+    # to an incremental decode starting at the first '['
+    start = content.find('[')
+    if start < 0:
+        return []
     try:
-        # Rate limit LLM extraction calls
-        await gemini_rate_limiter.acquire()
-        response: ProductInfoTool = await _tool_llm.ainvoke(prompt)
+        sites = orjson.loads(content[start:content.rfind(']') + 1])
+    except orjson.JSONDecodeError:
+        try:
+            sites, _ = _JSON_DECODER.raw_decode(content, start)
+        except ValueError:
+            return []
+    if not isinstance(sites, list):
+        return []
 
-        # Enhanced validation
-        if not response.product_name or response.price <= 0:
-            return None
+    if sites:
+        await cache_country_sites(country, sites)
+    return sites
 
-        # More lenient relevance check for search query
-        if search_query:
-            search_words = search_query.lower().split()
-            product_name_lower = response.product_name.lower()
 
-            # Look for brand names and key product identifiers
-            significant_words = [w for w in search_words if len(w) > 2 and w not in ['the', 'and', 'for', 'with', 'buy', 'get']]
+async def enhance_query(query: str, country: str) -> str:
+    """
+    Agent: Enhance user query for better search results (with rate limiting).
+
+    Args:
+        query: Original user query
+        country: Target country code
+
+    Returns:
+        Enhanced query string
+    """
+    country = _normalize_country(country)
+    enhanced_query = await _lookup_enhanced_query(query, country)
+    if enhanced_query is not None:
+        return enhanced_query
+    return await _enhance_query_llm(query, country)
+
+
+async def _lookup_enhanced_query(query: str, country: str) -> Optional[str]:
+    """Enhanced query from the skip rules or the caches, or None if the LLM is needed."""
+    # Simple enhancement rules to avoid LLM call for common cases
+    query_lower = query.lower()
+
+    # If query is already well-formed, skip LLM enhancement
+    if any(brand in query_lower for brand in _KNOWN_BRANDS):
+        if any(spec in query_lower for spec in _SPEC_MARKERS):
+            log.info("📝 Query '%s' is already well-formed, skipping LLM enhancement", query)
+            return query
+
+    canonical_query = " ".join(query_lower.split())
+    persisted_query = await get_enhanced_query(canonical_query, country)
+    if persisted_query:
+        log.info("💾 Using persisted enhancement for query '%s'", query)
+        return persisted_query
+
+    # Paraphrases of an already-enhanced query reuse its rewrite
+    cached_query = semantic_get(f"enhance_query:{country}", canonical_query, settings.SEMANTIC_CACHE_QUERY_THRESHOLD)
+    if cached_query is not None:
+        log.info("⚡ Semantic cache hit for query '%s'", query)
+        return cached_query
+    return None
+
+
+async def _enhance_query_llm(query: str, country: str) -> str:
+    """Enhance a query with the LLM and remember the rewrite."""
+    # Use LLM for complex queries
+    log.info("🤖 Using LLM query enhancement")
+
+    prompt = f"{ENHANCE_QUERY_PROMPT}Target country: {country}\nOriginal query: \"{query}\""
+
+    content = await _cached_invoke(_llm, prompt, "enhance_query")
+    enhanced_query = content.strip().strip('"\'')
+    await _remember_enhanced_query(query, country, enhanced_query)
+    return enhanced_query
+
+
+async def _remember_enhanced_query(query: str, country: str, enhanced_query: str):
+    """Store a query rewrite in the semantic and persistent caches."""
+    canonical_query = " ".join(query.lower().split())
+    semantic_set(f"enhance_query:{country}", canonical_query, enhanced_query)
+    if enhanced_query:
+        await cache_enhanced_query(canonical_query, country, enhanced_query)
+
+
+async def bootstrap(query: str, country: str) -> SitesAndQuery:
+    """
+    Agent: Select sites and enhance the query for one search, with at most one LLM call.
 
-            # Be more lenient - if any significant word matches OR if it's a reasonable product name, keep it
-            has_match = any(word in product_name_lower for word in significant_words)
-            is_reasonable_product = len(response.product_name) > 5 and not any(skip in product_name_lower for skip in ['error', 'not found', 'page'])
+    Each half is answered from its caches when possible; when both need the LLM they are
+    fused into a single prompt instead of two back-to-back Gemini round-trips.
+
+    Args:
+        query: Original user query
+        country: Target country code
+
+    Returns:
+        SitesAndQuery with the sites to search and the enhanced query
+    """
+    country = _normalize_country(country)
+    sites, enhanced_query = await asyncio.gather(_lookup_sites(country), _lookup_enhanced_query(query, country))
+
+    if sites is None and enhanced_query is None:
+        log.info("🤖 Using combined LLM site discovery and query enhancement for %s", country)
+        prompt = f"{BOOTSTRAP_PROMPT}Target country: {country}\nOriginal query: \"{query}\""
+        try:
+            fused: Optional[SitesAndQuery] = await _cached_invoke(_bootstrap_llm, prompt, "bootstrap", SitesAndQuery)
+        except Exception as e:
+            log.warning("Combined bootstrap call failed, falling back to separate calls: %s", e)
+            fused = None
+        if fused is not None and fused.sites and fused.enhanced_query.strip():
+            sites = [site.model_dump() for site in fused.sites]
+            enhanced_query = fused.enhanced_query.strip().strip('"\'')
+            await asyncio.gather(
+                cache_country_sites(country, sites), _remember_enhanced_query(query, country, enhanced_query)
+            )
+
+    # Anything still missing (one half was cached, or the combined call failed) is fetched
+    # with both LLM calls in flight at once rather than back-to-back
+    sites, enhanced_query = await asyncio.gather(
+        _discover_sites_llm(country) if sites is None else _resolved(sites),
+        _enhance_query_llm(query, country) if enhanced_query is None else _resolved(enhanced_query),
+    )
+    return SitesAndQuery(enhanced_query=enhanced_query, sites=sites)
+
+
+async def _resolved(value: Any) -> Any:
+    """Wrap an already-known value as an awaitable so it can sit alongside pending calls in gather()."""
+    return value
+
+
+def _is_valid_product(info: Optional[ProductInfoTool], search_query: str) -> bool:
+    """
+    Validate an LLM extraction: non-empty name, positive price, relevant to the query, not a non-product page.
+
+    Args:
+        info: Structured extraction returned by the LLM (None if it declined)
+        search_query: The search query the product must be relevant to
+
+    Returns:
+        True if the extraction should be kept
+    """
+    # Enhanced validation
+    if info is None or not info.product_name or info.price <= 0:
+        return False
+
+    product_name_lower = info.product_name.lower()
+
+    # More lenient relevance check for search query
+    if search_query:
+        # Look for brand names and key product identifiers
+        significant_words_re = _significant_words_re(search_query)
+
+        # Be more lenient - if any significant word matches OR if it's a reasonable product name, keep it
+        has_match = significant_words_re is not None and significant_words_re.search(product_name_lower)
+        is_reasonable_product = len(info.product_name) > 5 and not _ERROR_PAGE_RE.search(product_name_lower)
+
+        if significant_words_re is not None and not has_match and not is_reasonable_product:
+            log.info("❌ Product '%s' doesn't match search '%s' - skipping", info.product_name, search_query)
+            return False
+
+    # Filter out common non-product titles
+    return not _SKIP_PHRASES_RE.search(product_name_lower)
+
+
+def _pick_best_window(cleaned_html: str, max_tokens: int) -> str:
+    """
+    Cut page content down to the token budget around its densest cluster of title/price markers.
+
+    A plain prefix cut loses the product when its price block sits deep in the page. The
+    window starts at the marker that has the most other markers within one budget after it;
+    the main title line is kept in front when the window starts later in the page.
+
+    Args:
+        cleaned_html: Output of prepare_html_for_llm
+        max_tokens: Token budget
+
+    Returns:
+        Content that fits the budget (a prefix cut if the content has no markers)
+    """
+    if estimate_tokens(cleaned_html) <= max_tokens:
+        return cleaned_html
+
+    positions = [m.start() for m in _WINDOW_MARKER_RE.finditer(cleaned_html)]
+    if not positions:
+        return truncate_to_tokens(cleaned_html, max_tokens)
+
+    budget = max_tokens * CHARS_PER_TOKEN
+    best_start, best_last, best_count, end = positions[0], positions[0], 0, 0
+    for i, start in enumerate(positions):
+        while end < len(positions) and positions[end] < start + budget:
+            end += 1
+        if end - i > best_count:
+            best_start, best_last, best_count = start, positions[end - 1], end - i
+
+    # A prefix cut is enough only when it already holds the window's last marker line in full
+    prefix = truncate_to_tokens(cleaned_html, max_tokens)
+    last_line_end = cleaned_html.find("\n", best_last)
+    if best_start == 0 or (last_line_end if last_line_end != -1 else len(cleaned_html)) <= len(prefix):
+        return prefix
+
+    head = ""
+    if cleaned_html.startswith("[MAIN PRODUCT TITLE]"):
+        head = truncate_to_tokens(cleaned_html[:cleaned_html.find("\n") + 1], max_tokens // 10)
+    return head + truncate_to_tokens(cleaned_html[best_start:], max_tokens - estimate_tokens(head))
+
+
+# Extractions started during the current search, keyed by page hash (None outside a search scope)
+_request_extractions: contextvars.ContextVar[Optional[Dict[str, "asyncio.Future"]]] = contextvars.ContextVar(
+    "request_extractions", default=None
+)
+
+
+@contextlib.contextmanager
+def request_extraction_scope():
+    """Deduplicate identical pages across sites for the duration of one search request."""
+    extractions = {}
+    token = _request_extractions.set(extractions)
+    try:
+        yield
+    finally:
+        _request_extractions.reset(token)
+        # Extractions still running (their callers timed out) have nobody left to answer
+        for task in extractions.values():
+            task.cancel()
 
-            if significant_words and not has_match and not is_reasonable_product:
-                print(f"❌ Product '{response.product_name}' doesn't match search '{search_query}' - skipping")
-                return None
 
-        # Filter out common non-product titles
-        skip_phrases = ["about us", "contact", "search results", "customers also bought", "page not found", "error", "404", "recommendations", "related products"]
-        if any(phrase in response.product_name.lower() for phrase in skip_phrases):
+def extract_from_json_ld(raw_html: str, site_name: str, search_query: str = "") -> Optional[ProductResult]:
+    """
+    Agent: Tier 1 Extraction from the page's schema.org JSON-LD, with no LLM call.
+
+    Args:
+        raw_html: Raw HTML content to extract from
+        site_name: Name of the site being scraped
+        search_query: The original search query to help validate extraction
+
+    Returns:
+        ProductResult if the structured data names a valid product, None otherwise
+    """
+    product = extract_json_ld_product(raw_html)
+    if product is None:
+        return None
+
+    # Same relevance and non-product checks as an LLM extraction
+    info = ProductInfoTool.model_construct(**product)
+    if not _is_valid_product(info, search_query):
+        return None
+
+    # extract_json_ld_product already returns typed fields, so skip re-validation unless debugging
+    build_result = ProductResult if settings.DEBUG else ProductResult.model_construct
+    return build_result(
+        link="",  # Will be filled by calling agent
+        site_name=site_name,
+        confidence_score=0.95,  # Publisher-declared data, no model interpretation involved
+        **product,
+    )
+
+
+async def extract_from_html(raw_html: str, site_name: str, search_query: str = "") -> Optional[ProductResult]:
+    """
+    Agent: Tier 2 Extraction using preprocessed HTML and query-aware prompting.
+
+    Args:
+        raw_html: Raw HTML content to extract from
+        site_name: Name of the site being scraped
+        search_query: The original search query to help validate extraction
+
+    Returns:
+        ProductResult if extraction successful, None otherwise
+    """
+    # Preprocess the HTML first! Prefer the compact flat-JSON view, fall back to marker text.
+    # Parsing is CPU-bound, so run it in the process pool to keep the event loop serving LLM calls
+    loop = asyncio.get_running_loop()
+    cleaned_html, flat_json, heading = await loop.run_in_executor(
+        get_process_pool(), prepare_html_for_llm, raw_html, settings.EXTRACT_MAX_HTML_TOKENS
+    )
+
+    if not cleaned_html.strip():
+        log.info("HTML for %s was empty after cleaning. Skipping LLM call.", site_name)
+        return None
+
+    # Error/interstitial pages and pages without any price can't yield a product (flat JSON is price-checked already).
+    # Only the title and h1 are checked: footers and country pickers on real product pages use the same phrases
+    if _DEAD_PAGE_RE.search(heading) or not (flat_json or _PRICE_PRESENT_RE.search(cleaned_html)):
+        log.info("🚫 No product price on %s page. Skipping LLM call.", site_name)
+        return None
+
+    # Windowed content is also the response-cache key, so unchanged pages never reach Gemini again.
+    # Flat JSON was already cut to the budget at element boundaries; a character cut would break it
+    page_content = cleaned_html if flat_json else _pick_best_window(cleaned_html, settings.EXTRACT_MAX_HTML_TOKENS)
+
+    # Syndicated pages rehosted on other sites within the same search are extracted only once
+    seen = _request_extractions.get()
+    if seen is None:
+        return await _extract_product(page_content, site_name, search_query)
+
+    page_hash = hashlib.blake2b(f"{search_query}\0{page_content}".encode(), digest_size=16).hexdigest()
+    task = seen.get(page_hash)
+    if task is None:
+        task = seen[page_hash] = asyncio.ensure_future(_extract_product(page_content, site_name, search_query))
+    else:
+        log.info("♻️ Page for %s duplicates one already extracted in this search", site_name)
+    result = await asyncio.shield(task)
+    return result.model_copy(update={"site_name": site_name}) if result else None
+
+
+@async_lru(
+    maxsize=settings.LLM_CACHE_MAX_SIZE,
+    ttl=settings.CACHE_DURATION_HOURS * 3600,
+    dumps=lambda result: result.model_dump_json().encode(),
+    loads=ProductResult.model_validate_json,
+)
+async def _extract_product(page_content: str, site_name: str, search_query: str) -> Optional[ProductResult]:
+    """
+    Run the extraction prompt on cleaned page content and validate the result.
+
+    Args:
+        page_content: Cleaned, token-truncated page content
+        site_name: Name of the site being scraped
+        search_query: The original search query to help validate extraction
+
+    Returns:
+        ProductResult if extraction successful, None otherwise
+    """
+    try:
+        # Near-duplicate pages for the same site and query reuse the earlier extraction; the whole
+        # page is compared, so a changed price anywhere in it is a miss
+        semantic_key = f"{site_name}||{page_content}||{search_query}"
+        response: Optional[ProductInfoTool] = semantic_get(
+            f"extract_from_html:{site_name}", semantic_key, settings.SEMANTIC_CACHE_EXTRACT_THRESHOLD
+        )
+        if response is not None:
+            log.info("⚡ Semantic cache hit for %s", site_name)
+        else:
+            # Concurrent misses are batched into one Gemini request; rate limiting is applied by the cache
+            response = await _extraction_batcher.submit((page_content, site_name, search_query))
+            if response is not None:
+                semantic_set(f"extract_from_html:{site_name}", semantic_key, response)
+
+        if not _is_valid_product(response, search_query):
             return None
 
-        return ProductResult(
+        # Fields were already typed and validated by ProductInfoTool, so skip re-validation unless debugging
+        build_result = ProductResult if settings.DEBUG else ProductResult.model_construct
+        return build_result(
             product_name=response.product_name,
             price=response.price,
             currency=response.currency,
@@ -261,5 +736,72 @@ If any of these conditions are not met, DO NOT call the tool. Do not guess or us
             confidence_score=0.9  # Higher confidence due to query validation
         )
     except Exception as e:
-        print(f"Tier 2 LLM extraction failed for {site_name}: {e}")
+        log.warning("Tier 2 LLM extraction failed for %s: %s", site_name, e)
         return None
+
+
+def _page_block(page_content: str, site_name: str, search_query: str) -> str:
+    """Render the page-specific tail of an extraction prompt."""
+    return (
+        f"**SITE:** {site_name}\n"
+        f"**SEARCH QUERY:** \"{search_query}\"\n\n"
+        f"**HTML CONTENT TO ANALYZE:**\n---\n{page_content}\n---\n\n"
+    )
+
+
+async def _extract_pages(pages: List[Tuple[str, str, str]]) -> List[Optional[ProductInfoTool]]:
+    """
+    Run the extraction prompt for one or more (page_content, site_name, search_query) pages in a single LLM call.
+
+    Returns:
+        One ProductInfoTool or None per page, in input order
+    """
+    if len(pages) == 1:
+        return [await _extract_page(pages[0])]
+
+    blocks = "".join(f"### PAGE {i}\n{_page_block(*page)}" for i, page in enumerate(pages, 1))
+    prompt = f"{EXTRACT_PROMPT_PREFIX}\n{blocks}{EXTRACT_BATCH_PROMPT_SUFFIX}"
+    log.info("📦 Extracting %d pages in one LLM request", len(pages))
+    response: Optional[ProductInfoBatchTool] = await _cached_invoke(
+        _batch_tool_llm, prompt, "extract_from_html_batch", ProductInfoBatchTool
+    )
+
+    results: List[Optional[ProductInfoTool]] = [None] * len(pages)
+    if response is None:
+        return results  # The model found no matching product on any page
+
+    retry_pages = {page for page in response._rejected_pages if page is not None and 1 <= page <= len(pages)}
+    misnumbered = len(retry_pages) < len(response._rejected_pages)
+    for product in response.products:
+        if not 1 <= product.page <= len(pages):
+            misnumbered = True
+        elif results[product.page - 1] is None:
+            results[product.page - 1] = product
+
+    # Pages are left out on purpose when they show no matching product; only retry pages whose
+    # entry was invalid, or every unanswered page when an entry can't be placed on its page
+    missing = [i for i, result in enumerate(results) if result is None and (misnumbered or i + 1 in retry_pages)]
+    if missing:
+        log.info("🔁 Re-extracting %d of %d pages with an unusable batch entry", len(missing), len(pages))
+        retried = await asyncio.gather(*(_extract_page(pages[i]) for i in missing), return_exceptions=True)
+        for i, result in zip(missing, retried):
+            if isinstance(result, Exception):
+                log.warning("Single-page extraction failed for %s: %s", pages[i][1], result)
+            else:
+                results[i] = result
+    return results
+
+
+async def _extract_page(page: Tuple[str, str, str]) -> Optional[ProductInfoTool]:
+    """Run the single-page extraction prompt for one (page_content, site_name, search_query) page."""
+    # Anti-hallucination prompt: static instructions first, page-specific values last
+    prompt = f"{EXTRACT_PROMPT_PREFIX}\n{_page_block(*page)}{EXTRACT_PROMPT_SUFFIX}"
+    return await _cached_invoke(_tool_llm, prompt, "extract_from_html", ProductInfoTool)
+
+
+_extraction_batcher = MicroBatcher(
+    _extract_pages,
+    max_batch_size=settings.MAX_SITES_TO_EXTRACT,
+    window_seconds=settings.EXTRACT_BATCH_WINDOW_MS / 1000,
+)
+
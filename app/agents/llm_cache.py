@@ -0,0 +1,78 @@
+"""
+Response-level memoization for LLM agents and other paid API lookups (SerpApi).
+
+Whole agent results are cached keyed on the agent name and its exact arguments: first
+in process memory, then (optionally) in the SQLite cache so hits survive restarts.
+Concurrent misses for the same key are coalesced, so a burst of identical requests
+costs a single Gemini call.
+"""
+
+import functools
+import hashlib
+import time
+from typing import Any, Callable
+
+import orjson
+
+from app.core.cache import cache_llm_response, get_llm_response
+from app.utils.single_flight import single_flight
+from app.utils.ttl_cache import TTLCache
+
+
+def async_lru(
+    maxsize: int = 1024,
+    ttl: float = 3600,
+    persist: bool = True,
+    dumps: Callable[[Any], bytes] = orjson.dumps,
+    loads: Callable[[bytes], Any] = orjson.loads,
+):
+    """
+    Memoize an async agent function by its arguments.
+
+    Only truthy results are cached, so failed or empty extractions are retried. Values are
+    stored serialized and decoded on every hit, so callers can mutate what they get back.
+
+    Args:
+        maxsize: Maximum number of in-memory entries
+        ttl: Time-to-live in seconds, for both the memory and SQLite tiers
+        persist: Whether to also store results in the SQLite cache
+        dumps: Serializer for results
+        loads: Deserializer for cached results
+
+    Returns:
+        Decorator for async functions with JSON-serializable arguments
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        memory = TTLCache(maxsize=maxsize, ttl=ttl)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = hashlib.blake2b(orjson.dumps([name, args, kwargs], option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+            data = memory.get(key)
+            if data is None and persist:
+                entry = await get_llm_response(key)
+                if entry is not None:
+                    data, expires_at = entry
+                    memory.set(key, data, ttl=expires_at - time.time())
+            if data is not None:
+                return loads(data)
+
+            async def compute():
+                result = await func(*args, **kwargs)
+                if not result:
+                    return None, result
+                data = dumps(result)
+                memory.set(key, data)
+                if persist:
+                    await cache_llm_response(key, data, time.time() + ttl)
+                return data, result
+
+            data, result = await single_flight(key, compute)
+            return result if data is None else loads(data)
+
+        wrapper.cache_stats = memory.stats
+        return wrapper
+
+    return decorator
@@ -3,11 +3,28 @@ NEW AGENT: Uses a search engine API (SerpApi) to find direct product URLs.
 """
 
 import asyncio
-import json
+import logging
+import re
 from typing import List, Dict, Optional
-from serpapi import GoogleSearch
 
+import orjson
+
+from app.agents.llm_cache import async_lru
 from app.config import settings
+from app.utils.http_client import get_http_client
+from app.utils.rate_limiter import serpapi_rate_limiter
+
+log = logging.getLogger(__name__)
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+# Organic-result triage: listing/support pages are skipped, product-looking URLs and titles are preferred
+_SKIP_URL_RE = re.compile(r'/(?:search|category|brand-showcase|compare|support|help|blog|news|promo)', re.I)
+_PRODUCT_URL_RE = re.compile(r'/(?:product|p|item|dp|buy|shop)/', re.I)
+_PRODUCT_TITLE_RE = re.compile(r'iphone|samsung|sony|apple|google')
+
+# Caps SerpApi searches in flight across all requests; the rate limiter caps searches per second
+_serpapi_semaphore = asyncio.Semaphore(settings.SERPAPI_MAX_CONCURRENT)
 
 
 async def find_product_urls(query: str, sites: List[Dict[str, str]]) -> List[Dict[str, str]]:
@@ -21,23 +38,33 @@ async def find_product_urls(query: str, sites: List[Dict[str, str]]) -> List[Dic
     Returns:
         A list of dictionaries, each containing the site domain and the discovered product URL.
     """
-    loop = asyncio.get_event_loop()
-    tasks = []
-    for site in sites:
-        # Construct a site-specific search query for Google
-        search_query = f'{query} site:{site["domain"]}'
-        tasks.append(loop.run_in_executor(None, _search_for_site, search_query, site))
-
-    results = await asyncio.gather(*tasks)
+    # Normalize once so casing/spacing variants of a query share cached search results
+    normalized_query = " ".join(query.lower().split())
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(_find_site_url(normalized_query, site["domain"])) for site in sites]
+
     # Filter out any searches that failed
-    return [res for res in results if res]
+    return [res for res in (task.result() for task in tasks) if res]
 
 
-def _search_for_site(query: str, site_info: Dict[str, str]) -> Optional[Dict[str, str]]:
-    """Synchronous wrapper for SerpApi search with detailed logging."""
-    domain = site_info["domain"]
+@async_lru(maxsize=4096, ttl=settings.SERPAPI_CACHE_TTL_HOURS * 3600)
+async def _find_site_url(query: str, domain: str) -> Optional[Dict[str, str]]:
+    """Find the product URL for a query on one site, cached and within the SerpApi concurrency/rate limits."""
+    async with _serpapi_semaphore, serpapi_rate_limiter:
+        # Bound only the search itself, so time spent queued for a slot doesn't count against it
+        try:
+            async with asyncio.timeout(settings.HTTP_CLIENT_TIMEOUT):
+                # Construct a site-specific search query for Google
+                return await _search_for_site(f'{query} site:{domain}', domain)
+        except TimeoutError:
+            log.warning("⏱️ SerpApi search timed out for %s", domain)
+            return None
+
+
+async def _search_for_site(query: str, domain: str) -> Optional[Dict[str, str]]:
+    """Query the SerpApi JSON endpoint directly on the shared async client, with detailed debug logging."""
     try:
-        print(f"🔍 Searching Google for '{query}' on {domain}...")
+        log.debug("🔍 Searching Google for '%s' on %s...", query, domain)
         params = {
             "q": query,
             "api_key": settings.SERPAPI_API_KEY,
@@ -45,37 +72,42 @@ def _search_for_site(query: str, site_info: Dict[str, str]) -> Optional[Dict[str
             "google_domain": "google.com",  # Can be customized per country
         }
 
-        print(f"📋 SerpAPI Request Parameters:")
-        print(f"   • Query: {params['q']}")
-        print(f"   • Engine: {params['engine']}")
-        print(f"   • Google Domain: {params['google_domain']}")
-        print(f"   • API Key: {params['api_key'][:10]}...{params['api_key'][-4:]}")
+        log.debug(
+            "📋 SerpAPI Request Parameters: query=%s engine=%s google_domain=%s api_key=%s...%s",
+            params["q"], params["engine"], params["google_domain"], params["api_key"][:10], params["api_key"][-4:]
+        )
 
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        # SerpApi reports failures as a JSON body with an "error" key, so parse it regardless of status
+        response = await get_http_client().get(SERPAPI_URL, params=params, timeout=settings.HTTP_CLIENT_TIMEOUT)
+        results = orjson.loads(response.content)
 
         # Log the full SerpAPI response for debugging
-        print(f"📊 SerpAPI Response for {domain}:")
-        print(f"   • Response keys: {list(results.keys())}")
-
-        # Log search information if available
-        if "search_information" in results:
-            search_info = results["search_information"]
-            print(f"   • Search Information:")
-            print(f"     - Query displayed: {search_info.get('query_displayed', 'N/A')}")
-            print(f"     - Total results: {search_info.get('total_results', 'N/A')}")
-            print(f"     - Time taken: {search_info.get('time_taken_displayed', 'N/A')}")
-
-        # Log organic results details
+        debug = log.isEnabledFor(logging.DEBUG)
+        if debug:
+            log.debug("📊 SerpAPI Response for %s: keys=%s", domain, list(results.keys()))
+
+            # Log search information if available
+            if "search_information" in results:
+                search_info = results["search_information"]
+                log.debug(
+                    "   • Search Information: query displayed=%s, total results=%s, time taken=%s",
+                    search_info.get("query_displayed", "N/A"),
+                    search_info.get("total_results", "N/A"),
+                    search_info.get("time_taken_displayed", "N/A")
+                )
+
+        # Check organic results
         if "organic_results" in results:
             organic_count = len(results["organic_results"])
-            print(f"   • Organic results found: {organic_count}")
 
             if organic_count > 0:
-                for i, result in enumerate(results["organic_results"][:3]):  # Show first 3
-                    print(f"     {i+1}. Title: {result.get('title', 'N/A')[:60]}...")
-                    print(f"        Link: {result.get('link', 'N/A')}")
-                    print(f"        Snippet: {result.get('snippet', 'N/A')[:80]}...")
+                if debug:
+                    log.debug("   • Organic results found: %d", organic_count)
+                    for i, result in enumerate(results["organic_results"][:3]):  # Show first 3
+                        log.debug(
+                            "     %d. Title: %s... Link: %s Snippet: %s...",
+                            i + 1, result.get("title", "N/A")[:60], result.get("link", "N/A"), result.get("snippet", "N/A")[:80]
+                        )
 
                 # Filter and prioritize product URLs
                 product_urls = []
@@ -84,18 +116,11 @@ def _search_for_site(query: str, site_info: Dict[str, str]) -> Optional[Dict[str
                     title = result.get("title", "").lower()
 
                     # Skip non-product URLs
-                    if any(skip_term in url.lower() for skip_term in [
-                        '/search', '/category', '/brand-showcase', '/compare',
-                        '/support', '/help', '/blog', '/news', '/promo'
-                    ]):
+                    if _SKIP_URL_RE.search(url):
                         continue
 
                     # Prioritize direct product URLs
-                    if any(product_term in url.lower() for product_term in [
-                        '/product/', '/p/', '/item/', '/dp/', '/buy/', '/shop/'
-                    ]) or any(product_term in title for product_term in [
-                        'iphone', 'samsung', 'sony', 'apple', 'google'
-                    ]):
+                    if _PRODUCT_URL_RE.search(url) or _PRODUCT_TITLE_RE.search(title):
                         product_urls.append({"url": url, "title": title, "priority": 1})
                     else:
                         product_urls.append({"url": url, "title": title, "priority": 2})
@@ -103,36 +128,33 @@ def _search_for_site(query: str, site_info: Dict[str, str]) -> Optional[Dict[str
                 # Sort by priority and return best URL
                 if product_urls:
                     best_url = sorted(product_urls, key=lambda x: x["priority"])[0]
-                    print(f"✅ Found product URL for {domain}: {best_url['url']}")
-                    print(f"   Title: {best_url['title'][:80]}...")
+                    log.info("✅ Found product URL for %s: %s", domain, best_url["url"])
                     return {"domain": domain, "url": best_url["url"]}
                 else:
-                    print(f"❌ No product URLs found for {domain}")
+                    log.info("❌ No product URLs found for %s", domain)
             else:
-                print(f"❌ Organic results array is empty for {domain}")
+                log.info("❌ Organic results array is empty for %s", domain)
         else:
-            print(f"❌ No 'organic_results' key in response for {domain}")
+            log.info("❌ No 'organic_results' key in response for %s", domain)
 
         # Log any error messages from SerpAPI
         if "error" in results:
-            print(f"🚨 SerpAPI Error for {domain}: {results['error']}")
-
-        # Log any other interesting keys
-        other_keys = [k for k in results.keys() if k not in ['organic_results', 'search_information', 'error']]
-        if other_keys:
-            print(f"   • Other response keys: {other_keys}")
-
-        # Log the raw response for debugging (truncated)
-        raw_response = json.dumps(results, indent=2)
-        if len(raw_response) > 1000:
-            print(f"   • Raw response (truncated): {raw_response[:500]}...{raw_response[-500:]}")
-        else:
-            print(f"   • Raw response: {raw_response}")
+            log.warning("🚨 SerpAPI Error for %s: %s", domain, results["error"])
+
+        if debug:
+            # Log any other interesting keys
+            other_keys = [k for k in results.keys() if k not in ['organic_results', 'search_information', 'error']]
+            if other_keys:
+                log.debug("   • Other response keys: %s", other_keys)
+
+            # Log the raw response for debugging (truncated)
+            raw_response = orjson.dumps(results, option=orjson.OPT_INDENT_2).decode()
+            if len(raw_response) > 1000:
+                log.debug("   • Raw response (truncated): %s...%s", raw_response[:500], raw_response[-500:])
+            else:
+                log.debug("   • Raw response: %s", raw_response)
 
-    except Exception as e:
-        print(f"❌ SerpApi search failed for {domain}: {e}")
-        print(f"   • Exception type: {type(e).__name__}")
-        import traceback
-        print(f"   • Traceback: {traceback.format_exc()}")
+    except Exception:
+        log.exception("❌ SerpApi search failed for %s", domain)
 
     return None
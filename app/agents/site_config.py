@@ -0,0 +1,80 @@
+"""
+Static retailer lists per country, used instead of LLM site discovery where available.
+
+This is the single source of truth for known sites. The mapping is read-only and
+get_static_sites() hands out copies, so callers can never alter it for later requests.
+"""
+
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
+
+# Static site cache to reduce LLM calls for site discovery
+STATIC_SITE_CACHE: Mapping[str, Tuple[Dict[str, str], ...]] = MappingProxyType({
+    "US": (
+        {"domain": "amazon.com", "base_url": "https://www.amazon.com"},
+        {"domain": "bestbuy.com", "base_url": "https://www.bestbuy.com"},
+        {"domain": "target.com", "base_url": "https://www.target.com"},
+        {"domain": "walmart.com", "base_url": "https://www.walmart.com"},
+        {"domain": "apple.com", "base_url": "https://www.apple.com"},
+        {"domain": "verizon.com", "base_url": "https://www.verizon.com"},
+        {"domain": "att.com", "base_url": "https://www.att.com"},
+        {"domain": "costco.com", "base_url": "https://www.costco.com"},
+    ),
+    "GB": (
+        {"domain": "amazon.co.uk", "base_url": "https://www.amazon.co.uk"},
+        {"domain": "johnlewis.com", "base_url": "https://www.johnlewis.com"},
+        {"domain": "argos.co.uk", "base_url": "https://www.argos.co.uk"},
+        {"domain": "currys.co.uk", "base_url": "https://www.currys.co.uk"},
+        {"domain": "very.co.uk", "base_url": "https://www.very.co.uk"},
+        {"domain": "ebay.co.uk", "base_url": "https://www.ebay.co.uk"},
+        {"domain": "apple.com", "base_url": "https://www.apple.com"},
+        {"domain": "carphonewarehouse.com", "base_url": "https://www.carphonewarehouse.com"},
+    ),
+    "IN": (
+        {"domain": "amazon.in", "base_url": "https://www.amazon.in"},
+        {"domain": "flipkart.com", "base_url": "https://www.flipkart.com"},
+        {"domain": "reliancedigital.in", "base_url": "https://www.reliancedigital.in"},
+        {"domain": "croma.com", "base_url": "https://www.croma.com"},
+        {"domain": "vijaysales.com", "base_url": "https://www.vijaysales.com"},
+        {"domain": "tatacliq.com", "base_url": "https://www.tatacliq.com"},
+        {"domain": "apple.com", "base_url": "https://www.apple.com"},
+        {"domain": "snapdeal.com", "base_url": "https://www.snapdeal.com"},
+    ),
+    "CA": (
+        {"domain": "amazon.ca", "base_url": "https://www.amazon.ca"},
+        {"domain": "bestbuy.ca", "base_url": "https://www.bestbuy.ca"},
+        {"domain": "costco.ca", "base_url": "https://www.costco.ca"},
+        {"domain": "canadiantire.ca", "base_url": "https://www.canadiantire.ca"},
+        {"domain": "apple.com", "base_url": "https://www.apple.com"},
+        {"domain": "rogers.com", "base_url": "https://www.rogers.com"},
+        {"domain": "bell.ca", "base_url": "https://www.bell.ca"},
+        {"domain": "telus.com", "base_url": "https://www.telus.com"},
+    ),
+    "AU": (
+        {"domain": "amazon.com.au", "base_url": "https://www.amazon.com.au"},
+        {"domain": "jbhifi.com.au", "base_url": "https://www.jbhifi.com.au"},
+        {"domain": "harveynorman.com.au", "base_url": "https://www.harveynorman.com.au"},
+        {"domain": "officeworks.com.au", "base_url": "https://www.officeworks.com.au"},
+        {"domain": "apple.com", "base_url": "https://www.apple.com"},
+        {"domain": "telstra.com.au", "base_url": "https://www.telstra.com.au"},
+        {"domain": "optus.com.au", "base_url": "https://www.optus.com.au"},
+        {"domain": "bigw.com.au", "base_url": "https://www.bigw.com.au"},
+    ),
+    "DE": (
+        {"domain": "amazon.de", "base_url": "https://www.amazon.de"},
+        {"domain": "mediamarkt.de", "base_url": "https://www.mediamarkt.de"},
+        {"domain": "saturn.de", "base_url": "https://www.saturn.de"},
+        {"domain": "otto.de", "base_url": "https://www.otto.de"},
+        {"domain": "apple.com", "base_url": "https://www.apple.com"},
+        {"domain": "telekom.de", "base_url": "https://www.telekom.de"},
+        {"domain": "vodafone.de", "base_url": "https://www.vodafone.de"},
+        {"domain": "notebooksbilliger.de", "base_url": "https://www.notebooksbilliger.de"},
+    )
+})
+
+
+def get_static_sites(country: str) -> List[Dict[str, str]]:
+    """Get static site list for a country to avoid LLM calls (falls back to the US list)."""
+    sites = STATIC_SITE_CACHE.get(country) or STATIC_SITE_CACHE.get("US", ())
+    return [dict(site) for site in sites]
+
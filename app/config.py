@@ -2,39 +2,69 @@
 Configuration settings for the price comparison application.
 """
 
-import os
+from functools import lru_cache
 from typing import Optional
 from dotenv import load_dotenv
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-# Load environment variables from .env file
+# Load environment variables from .env file (the Google SDKs read credentials from os.environ too)
 load_dotenv()
 
 
-class Settings:
-    """Application settings and configuration."""
+class Settings(BaseSettings):
+    """Application settings and configuration. Every field can be overridden by an environment variable."""
+
+    model_config = SettingsConfigDict(frozen=True, extra="ignore", env_ignore_empty=True)
 
     # Google AI Studio Configuration (preferred over Vertex AI)
-    GOOGLE_AI_API_KEY: Optional[str] = os.environ.get("GOOGLE_AI_API_KEY")
+    GOOGLE_AI_API_KEY: Optional[str] = None
 
     # GCP Configuration - fallback to Vertex AI if Google AI Studio not available
-    GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+    GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = None
 
     # SerpApi Configuration
-    SERPAPI_API_KEY: Optional[str] = os.environ.get("SERPAPI_API_KEY")
+    SERPAPI_API_KEY: Optional[str] = None
 
     # Rate Limiting Configuration for Gemini Free Tier (10 req/min)
     GEMINI_RATE_LIMIT_PER_MINUTE: int = 10
     MAX_SITES_TO_EXTRACT: int = 5  # Increased to get minimum 3 results
     ENABLE_STATIC_SITE_CACHE: bool = True  # Cache common sites to reduce LLM calls
     MIN_REQUIRED_RESULTS: int = 3  # Minimum results required per request
-
-    # Cache Configuration (disabled)
-    # DB_FILE: str = "price_comparison.db"  # Caching removed
-    # CACHE_DURATION_HOURS: int = 24  # Caching removed
+    SERPAPI_RATE_PER_SEC: float = 5  # Ceiling on SerpApi searches per second across all requests
+    SERPAPI_MAX_CONCURRENT: int = 5  # SerpApi searches in flight across all requests
+    SERPAPI_CACHE_TTL_HOURS: int = 6  # Organic rankings are stable within hours
+
+    # LLM Client Configuration
+    LLM_WARMUP: bool = True  # Send one prompt at startup so the first request skips channel/auth setup
+    LLM_MAX_OUTPUT_TOKENS: int = 512  # Fits a site list or a multi-page extraction; Vertex AI only
+
+    # LLM Response Cache Configuration (exact-match, in-process)
+    LLM_CACHE_MAX_SIZE: int = 2048
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    SEMANTIC_CACHE_QUERY_THRESHOLD: float = 0.85  # Cosine similarity for reusing a query rewrite
+    SEMANTIC_CACHE_EXTRACT_THRESHOLD: float = 0.9  # Cosine similarity for reusing an extraction
+
+    # Persistent Cache Configuration (LLM-discovered sites and enhanced queries)
+    DB_FILE: str = "price_comparison.db"
+    CACHE_DURATION_HOURS: int = 168  # One week - retailer lists and query rewrites change slowly
     
+    # Prompt Configuration
+    EXTRACT_MAX_HTML_TOKENS: int = 2000  # Page content budget for extract_from_html (~8k ASCII chars)
+    EXTRACT_BATCH_WINDOW_MS: int = 25  # Concurrent extractions arriving within this window share one Gemini request
+
     # HTTP Configuration
     HTTP_CLIENT_TIMEOUT: int = 15
+    FETCH_MAX_HTML_BYTES: int = 524288  # Product title, price and structured data sit well within the first 512 KB
+    MAX_CONCURRENT_FETCHES: int = 8  # Product page downloads in flight across all requests
+    MAX_CONCURRENT_FETCHES_PER_HOST: int = 4  # Of those, how many may target the same retailer
+    EXTRACTION_BATCH_TIMEOUT: int = 60  # Sites still fetching or extracting after this many seconds are dropped
+    EXTRACTION_CACHE_TTL_SECONDS: int = 600  # Repeat searches reuse a URL's extraction (no re-fetch) this long
+    CAPTCHA_BLOCK_TTL_SECONDS: int = 1800  # A domain that served a CAPTCHA is skipped for this long
     
+    # Debug Configuration
+    DEBUG: bool = False  # Re-enables full model validation
+    LOG_LEVEL: str = "INFO"  # DEBUG adds per-site extraction and per-product result lines
+
     # API Configuration
     API_TITLE: str = "Ultimate Price Comparison API"
     API_VERSION: str = "3.0.0"
@@ -54,8 +84,14 @@ class Settings:
             raise ValueError(f"Required environment variables not set: {', '.join(missing)}")
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the settings instance (environment is read once); usable as a FastAPI dependency."""
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
+settings = get_settings()
 
 # Validate required environment variables on import (only warn, don't fail)
 import warnings
@@ -0,0 +1,286 @@
+"""
+SQLite-backed persistent cache for LLM-derived data (discovered sites, enhanced queries,
+memoized agent responses).
+
+Entries survive process restarts, so a country or query is only sent to the LLM once
+per cache period rather than once per deploy.
+"""
+
+import asyncio
+import atexit
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Optional, Tuple
+
+import orjson
+
+from app.config import settings
+from app.utils.single_flight import single_flight
+from app.utils.ttl_cache import TTLCache
+
+
+# Per-connection tuning: fsync per WAL checkpoint rather than per commit, in-memory temp
+# tables, memory-mapped reads, a 64 MB page cache, and waiting (not failing) on a locked DB
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def _connect(**kwargs) -> sqlite3.Connection:
+    """Open a connection to the cache database with the tuning PRAGMAs applied."""
+    conn = sqlite3.connect(settings.DB_FILE, check_same_thread=False, **kwargs)
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# Bumped whenever a table layout changes; older tables only hold re-derivable LLM output, so they are dropped
+_SCHEMA_VERSION = 2
+
+
+def _initialize_database():
+    """Create the cache tables if they don't exist."""
+    with _connect() as conn:
+        # WAL lets readers proceed while a writer commits (persistent, so set once)
+        conn.execute("PRAGMA journal_mode=WAL")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # v1: last_updated became INTEGER epoch seconds (was an ISO string)
+            conn.execute("DROP TABLE IF EXISTS enhanced_queries")
+        if version < 2:
+            # v2: country_sites.sites became orjson BLOB (was TEXT)
+            conn.execute("DROP TABLE IF EXISTS country_sites")
+        if version < _SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS country_sites (
+                country TEXT PRIMARY KEY,
+                sites BLOB NOT NULL,
+                last_updated INTEGER NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS enhanced_queries (
+                query TEXT NOT NULL,
+                country TEXT NOT NULL,
+                enhanced_query TEXT NOT NULL,
+                last_updated INTEGER NOT NULL,
+                PRIMARY KEY (query, country)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+
+
+_initialize_database()
+
+# Long-lived connections keep SQLite's page cache warm across requests. Reads run in
+# autocommit mode from any executor thread; writes are serialized through one connection.
+_read_conn = _connect(isolation_level=None)
+_write_conn = _connect()
+_write_lock = threading.Lock()
+
+
+@atexit.register
+def _close_connections():
+    _read_conn.close()
+    _write_conn.close()
+
+
+_CACHE_DURATION_SECONDS = settings.CACHE_DURATION_HOURS * 3600
+
+# Country codes are a tiny, heavily skewed keyspace: keep the hot ones in process memory
+_country_sites_memory = TTLCache(maxsize=256, ttl=_CACHE_DURATION_SECONDS)
+
+# Popular queries repeat across users; their rewrites are answered from memory the same way
+_enhanced_queries_memory = TTLCache(maxsize=settings.LLM_CACHE_MAX_SIZE, ttl=_CACHE_DURATION_SECONDS)
+
+
+def get_memory_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Get hit/miss statistics for the in-memory layers in front of SQLite."""
+    return {
+        "country_sites": _country_sites_memory.stats(),
+        "enhanced_queries": _enhanced_queries_memory.stats(),
+    }
+
+
+def _remaining_seconds(last_updated: int) -> int:
+    """Seconds until an entry written at last_updated (epoch seconds) leaves the cache period."""
+    return last_updated + _CACHE_DURATION_SECONDS - int(time.time())
+
+
+async def get_country_sites(country: str) -> Optional[List[Dict]]:
+    """
+    Get cached sites for a country.
+
+    Hot countries are answered from process memory without touching SQLite; concurrent
+    misses for the same country share one database read.
+
+    Args:
+        country: Country code
+
+    Returns:
+        List of site dictionaries, or None if missing or expired
+    """
+    sites = _country_sites_memory.get(country)
+    if sites is None:
+        sites = await single_flight(("country_sites", country), lambda: _read_country_sites(country))
+    return [dict(site) for site in sites] if sites is not None else None
+
+
+async def _read_country_sites(country: str) -> Optional[List[Dict]]:
+    """Read a country's sites from SQLite and remember a fresh hit in memory for its remaining lifetime."""
+    def db_read():
+        row = _read_conn.execute(
+            "SELECT sites, last_updated FROM country_sites WHERE country = ?", (country,)
+        ).fetchone()
+        if row:
+            remaining = _remaining_seconds(row[1])
+            if remaining > 0:
+                return orjson.loads(row[0]), remaining
+        return None
+
+    entry = await asyncio.get_running_loop().run_in_executor(None, db_read)
+    if entry is None:
+        return None
+    sites, remaining = entry
+    _country_sites_memory.set(country, sites, ttl=remaining)
+    return sites
+
+
+async def cache_country_sites(country: str, sites: List[Dict]):
+    """
+    Cache the sites discovered for a country.
+
+    Args:
+        country: Country code
+        sites: List of site dictionaries
+    """
+    def db_write():
+        # Upsert updates the row in place; REPLACE would delete and re-insert it
+        with _write_lock, _write_conn:
+            _write_conn.execute(
+                "INSERT INTO country_sites (country, sites, last_updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(country) DO UPDATE SET sites = excluded.sites, last_updated = excluded.last_updated",
+                (country, orjson.dumps(sites), int(time.time()))
+            )
+
+    await asyncio.get_running_loop().run_in_executor(None, db_write)
+    _country_sites_memory.set(country, [dict(site) for site in sites])
+
+
+async def get_enhanced_query(query: str, country: str) -> Optional[str]:
+    """
+    Get a cached enhanced query.
+
+    Repeated queries are answered from process memory without touching SQLite; concurrent
+    misses for the same query share one database read.
+
+    Args:
+        query: Normalized original query
+        country: Country code
+
+    Returns:
+        Enhanced query string, or None if missing or expired
+    """
+    enhanced_query = _enhanced_queries_memory.get((query, country))
+    if enhanced_query is None:
+        enhanced_query = await single_flight(
+            ("enhanced_queries", query, country), lambda: _read_enhanced_query(query, country)
+        )
+    return enhanced_query
+
+
+async def _read_enhanced_query(query: str, country: str) -> Optional[str]:
+    """Read a query rewrite from SQLite and remember a fresh hit in memory for its remaining lifetime."""
+    def db_read():
+        row = _read_conn.execute(
+            "SELECT enhanced_query, last_updated FROM enhanced_queries WHERE query = ? AND country = ?",
+            (query, country)
+        ).fetchone()
+        if row:
+            remaining = _remaining_seconds(row[1])
+            if remaining > 0:
+                return row[0], remaining
+        return None
+
+    entry = await asyncio.get_running_loop().run_in_executor(None, db_read)
+    if entry is None:
+        return None
+    enhanced_query, remaining = entry
+    _enhanced_queries_memory.set((query, country), enhanced_query, ttl=remaining)
+    return enhanced_query
+
+
+async def cache_enhanced_query(query: str, country: str, enhanced_query: str):
+    """
+    Cache an enhanced query.
+
+    Args:
+        query: Normalized original query
+        country: Country code
+        enhanced_query: LLM-enhanced query string
+    """
+    def db_write():
+        with _write_lock, _write_conn:
+            _write_conn.execute(
+                "INSERT INTO enhanced_queries (query, country, enhanced_query, last_updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(query, country) DO UPDATE SET enhanced_query = excluded.enhanced_query, "
+                "last_updated = excluded.last_updated",
+                (query, country, enhanced_query, int(time.time()))
+            )
+
+    await asyncio.get_running_loop().run_in_executor(None, db_write)
+    _enhanced_queries_memory.set((query, country), enhanced_query)
+
+
+async def get_llm_response(key: str) -> Optional[Tuple[bytes, float]]:
+    """
+    Get a memoized agent response.
+
+    Args:
+        key: Hash of the agent name and its arguments
+
+    Returns:
+        Tuple of (serialized value, expiry epoch seconds), or None if missing or expired
+    """
+    def db_read():
+        row = _read_conn.execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row and row[1] > time.time():
+            return row[0], row[1]
+        return None
+
+    return await asyncio.get_running_loop().run_in_executor(None, db_read)
+
+
+async def cache_llm_response(key: str, value: bytes, expires_at: float):
+    """
+    Cache a memoized agent response.
+
+    Args:
+        key: Hash of the agent name and its arguments
+        value: Serialized response
+        expires_at: Expiry time in epoch seconds
+    """
+    def db_write():
+        with _write_lock, _write_conn:
+            _write_conn.execute(
+                "INSERT INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, value, expires_at)
+            )
+
+    await asyncio.get_running_loop().run_in_executor(None, db_write)
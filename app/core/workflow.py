@@ -3,16 +3,56 @@ Main workflow orchestration using LangGraph - fully dynamic, config-free approac
 """
 
 import asyncio
-from typing import Dict
-
-import httpx
+import logging
+import re
+import weakref
+from operator import attrgetter
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import orjson
 from langgraph.graph import StateGraph, END
 
-from app.models import GraphState
+from app.models import GraphState, ProductResult
 from app.config import settings
 # Fully dynamic approach - no caching, no site configs, no tier1 scraping
-from app.agents.llm_agents import discover_sites, enhance_query, extract_from_html
+from app.agents.llm_agents import bootstrap, extract_from_html, extract_from_json_ld
+from app.agents.llm_cache import async_lru
 from app.agents.product_url_discovery import find_product_urls
+from app.utils.http_client import get_http_client
+from app.utils.ttl_cache import TTLCache
+
+log = logging.getLogger(__name__)
+
+# Phrases only a bot-wall page leaves in the extracted name/availability; a hit blocks the whole domain for a while
+_CAPTCHA_RE = re.compile("|".join(map(re.escape, [
+    "captcha",
+    "verify you are human",
+    "prove you're not a robot",
+])), re.I)
+
+# Weaker bot-wall hints that also occur in real product names ("iRobot ... Robot Vacuum"), so they are matched
+# against availability only; a hit drops only that result
+_BOT_WALL_HINT_RE = re.compile("|".join(map(re.escape, [
+    "verification",
+    "robot",
+    "automated",
+    "suspicious activity",
+    "security check",
+    "please complete",
+])), re.I)
+
+# Query parameters that only identify the click, not the page
+_TRACKING_PARAM_RE = re.compile(r'utm_|gclid$|fbclid$|msclkid$|_ga$|ref_?$|tag$', re.I)
+
+# Caps page fetches in flight across all requests (sockets and memory for response bodies)
+_fetch_semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_FETCHES)
+
+# Per-domain fetch limits, so concurrent searches don't pile onto one retailer; an entry lives only while in use
+_host_semaphores: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+
+# Domains that recently served a CAPTCHA page; skipped without a fetch or LLM call until the entry expires
+_captcha_domains = TTLCache(maxsize=1024, ttl=settings.CAPTCHA_BLOCK_TTL_SECONDS)
 
 
 def create_workflow() -> StateGraph:
@@ -20,91 +60,85 @@ def create_workflow() -> StateGraph:
     workflow = StateGraph(GraphState)
 
     # Add nodes - fully dynamic LLM-based approach (no site configs)
-    workflow.add_node("site_selection", site_selection_agent)
-    workflow.add_node("query_enhancement", query_enhancement_agent)
+    workflow.add_node("bootstrap", bootstrap_agent)  # Site selection + query enhancement in one step
     workflow.add_node("url_discovery", url_discovery_agent)
     workflow.add_node("llm_extraction", llm_extraction_agent)  # Direct LLM extraction for all sites
     workflow.add_node("consolidation", consolidation_agent)
 
     # Define the streamlined flow - skip Tier 1 scraping entirely
-    workflow.set_entry_point("site_selection")
-    workflow.add_edge("site_selection", "query_enhancement")
-    workflow.add_edge("query_enhancement", "url_discovery")
+    workflow.set_entry_point("bootstrap")
+    workflow.add_edge("bootstrap", "url_discovery")
     workflow.add_edge("url_discovery", "llm_extraction")  # Direct to LLM extraction
     workflow.add_edge("llm_extraction", "consolidation")
     workflow.add_edge("consolidation", END)
 
     return workflow.compile()
 
-async def site_selection_agent(state: GraphState) -> GraphState:
+async def bootstrap_agent(state: GraphState) -> GraphState:
     """
-    AGENT: This agent is the single source of truth for which sites to check.
-    It uses dynamic LLM discovery (no caching for fresh results).
+    AGENT: Selects which sites to check and enhances the user query for better search results.
+    Both come from caches where possible; otherwise they share a single LLM call.
     """
-    print("---AGENT: Site Selection---")
-    country = state["request"].country.value
-
-    print(f"🔍 Discovering sites for {country} with LLM (no cache)...")
-    discovered_sites = await discover_sites(country)
-    print(f"🔍 LLM discovered {len(discovered_sites)} sites:")
-    for i, site in enumerate(discovered_sites, 1):
-        print(f"   {i}. {site['domain']} - {site['base_url']}")
+    log.info("---AGENT: Site Selection & Query Enhancement---")
+    request = state["request"]
+    original_query = request.query
+    country = request.country.value
+
+    log.debug("🔤 Original query: '%s'", original_query)
+    log.debug("🌍 Target country: %s", country)
+
+    result = await bootstrap(original_query, country)
+    discovered_sites = [site.model_dump() for site in result.sites]
+    log.info("🔍 Selected %d sites", len(discovered_sites))
+    if log.isEnabledFor(logging.DEBUG):
+        for i, site in enumerate(discovered_sites, 1):
+            log.debug("   %d. %s - %s", i, site['domain'], site['base_url'])
     state["selected_sites"] = discovered_sites
 
-    return state
-
-
-async def query_enhancement_agent(state: GraphState) -> GraphState:
-    """AGENT: Enhance the user query for better search results."""
-    print("---AGENT: Query Enhancement---")
-    original_query = state["request"].query
-    country = state["request"].country.value
-
-    print(f"🔤 Original query: '{original_query}'")
-    print(f"🌍 Target country: {country}")
-
-    enhanced_query = await enhance_query(original_query, country)
+    enhanced_query = result.enhanced_query
     state["enhanced_query"] = enhanced_query
 
-    print(f"✨ Enhanced query: '{enhanced_query}'")
+    log.info("✨ Enhanced query: '%s'", enhanced_query)
     if enhanced_query != original_query:
-        print(f"📝 Query was optimized for better search results")
+        log.debug("📝 Query was optimized for better search results")
     else:
-        print(f"📝 Query was already optimal")
+        log.debug("📝 Query was already optimal")
 
     return state
 
 
 async def url_discovery_agent(state: GraphState) -> GraphState:
     """AGENT: Finds direct product URLs for each site using SerpAPI."""
-    print("---AGENT: Product URL Discovery (via SerpApi)---")
+    log.info("---AGENT: Product URL Discovery (via SerpApi)---")
     query = state["enhanced_query"]
     sites = state["selected_sites"]
 
-    print(f"🔍 Searching for '{query}' across {len(sites)} sites...")
+    log.info("🔍 Searching for '%s' across %d sites...", query, len(sites))
 
     discovered_urls = await find_product_urls(query, sites)
     state["product_urls"] = discovered_urls
 
-    print(f"📍 URL Discovery Results:")
-    print(f"   • Total sites searched: {len(sites)}")
-    print(f"   • URLs found: {len(discovered_urls)}")
+    log.info("📍 URL Discovery Results:")
+    log.info("   • Total sites searched: %d", len(sites))
+    log.info("   • URLs found: %d", len(discovered_urls))
 
     if discovered_urls:
-        print(f"🎯 Discovered product URLs:")
-        for i, url_info in enumerate(discovered_urls, 1):
-            print(f"   {i}. {url_info['domain']} → {url_info['url']}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("🎯 Discovered product URLs:")
+            for i, url_info in enumerate(discovered_urls, 1):
+                log.debug("   %d. %s → %s", i, url_info['domain'], url_info['url'])
     else:
-        print(f"❌ No product URLs found for any site")
+        log.info("❌ No product URLs found for any site")
 
     return state
 
 async def llm_extraction_agent(state: GraphState) -> GraphState:
     """AGENT: Direct LLM extraction for discovered product URLs (rate-limited for Gemini free tier)."""
-    print("---AGENT: LLM Extraction (Rate Limited)---")
+    log.info("---AGENT: LLM Extraction (Rate Limited)---")
 
-    if not state["product_urls"]:
-        print("❌ No URLs to extract from")
+    product_urls = _dedupe_urls(state["product_urls"])
+    if not product_urls:
+        log.info("❌ No URLs to extract from")
         return state
 
     # Adaptive rate limiting to ensure minimum results
@@ -112,114 +146,231 @@ async def llm_extraction_agent(state: GraphState) -> GraphState:
     min_required = settings.MIN_REQUIRED_RESULTS
 
     # If we have fewer URLs than minimum required, process all available
-    if len(state["product_urls"]) <= min_required:
-        urls_to_process = state["product_urls"]
-        print(f"📊 Processing all {len(urls_to_process)} URLs (below minimum threshold)")
+    if len(product_urls) <= min_required:
+        urls_to_process = product_urls
+        log.info("📊 Processing all %d URLs (below minimum threshold)", len(urls_to_process))
     else:
         # Use rate limiting but ensure we have enough for minimum results
-        urls_to_process = state["product_urls"][:max_extractions]
-        print(f"⚠️ Rate limiting: Processing {len(urls_to_process)}/{len(state['product_urls'])} URLs to stay within Gemini limits")
+        urls_to_process = product_urls[:max_extractions]
+        log.info("⚠️ Rate limiting: Processing %d/%d URLs to stay within Gemini limits", len(urls_to_process), len(product_urls))
 
-    print(f"🤖 Starting LLM extraction from {len(urls_to_process)} URLs...")
-    extraction_tasks = []
-    additional_urls = []  # Initialize here to avoid scope issues
+    log.info("🤖 Starting LLM extraction from %d URLs...", len(urls_to_process))
 
-    async with httpx.AsyncClient(headers={'User-Agent': 'Mozilla/5.0'}) as client:
-        # Fetch HTML for selected URLs
-        search_query = state.get("enhanced_query", state["request"].query)
-        for url_info in urls_to_process:
-            extraction_tasks.append(_extract_from_url(url_info, client, search_query))
+    # Fetch and extract each URL over the shared keep-alive client, handling results as they arrive
+    search_query = state.get("enhanced_query", state["request"].query)
 
-        # Execute tasks while client is still open
-        results = await asyncio.gather(*extraction_tasks)
-
-    # Process results and filter out CAPTCHA-protected sites
     valid_results = []
-    captcha_sites = []
-
-    for result in results:
-        if result:
-            # Check if result indicates CAPTCHA protection
-            if _is_captcha_protected(result):
-                captcha_sites.append(result.site_name)
-                print(f"🚫 Filtered out {result.site_name}: CAPTCHA protection detected")
-                state["tier_stats"]["tier1_fails"] += 1
-            else:
-                valid_results.append(result)
-                state["final_results"].append(result)
-                state["tier_stats"]["tier2_success"] += 1
-                print(f"✅ Successfully extracted from {result.site_name}: {result.product_name} - {result.currency}{result.price}")
-        else:
-            state["tier_stats"]["tier1_fails"] += 1
-
-    print(f"📊 Extraction Summary:")
-    print(f"   • Total URLs available: {len(state['product_urls'])}")
-    print(f"   • URLs processed (rate limited): {len(urls_to_process)}")
-    print(f"   • Successful extractions: {len(valid_results)}")
-    print(f"   • Failed extractions: {len(results) - len(valid_results)}")
+    captcha_sites = set()
+    tier_counts = {"tier1_success": 0, "tier2_success": 0}  # Kept results by the tier that answered them
+
+    # Process the first batch, then keep pulling further URLs while we're short of the minimum
+    batch = urls_to_process
+    total_processed = 0
+    while batch:
+        async for entry in _extract_from_urls(batch, search_query):
+            _record_result(entry, valid_results, captcha_sites, tier_counts)
+        total_processed += len(batch)
+
+        additional_needed = min_required - len(valid_results)
+        batch = product_urls[total_processed:total_processed + max(additional_needed, 0)]
+        if batch:
+            log.info("📈 Need %d more results. Processing %d additional URLs...", additional_needed, len(batch))
+
+    log.info("📊 Extraction Summary:")
+    log.info("   • Total URLs available: %d", len(product_urls))
+    log.info("   • URLs processed (rate limited): %d", total_processed)
+    log.info("   • Successful extractions: %d", len(valid_results))
+    log.info("   • Failed extractions: %d", total_processed - len(valid_results))
     if captcha_sites:
-        print(f"   • CAPTCHA-protected sites filtered: {', '.join(captcha_sites)}")
+        log.info("   • CAPTCHA-protected sites filtered: %s", ', '.join(captcha_sites))
 
-        # If we don't have enough results and there are more URLs available, try more
-        remaining_urls = state["product_urls"][len(urls_to_process):]
-        if len(valid_results) < settings.MIN_REQUIRED_RESULTS and remaining_urls:
-            additional_needed = settings.MIN_REQUIRED_RESULTS - len(valid_results)
-            additional_urls = remaining_urls[:additional_needed]
+    # Publish results and tier stats to the graph state once, after all batches
+    state["final_results"] = [*state["final_results"], *valid_results]
+    state["tier_stats"] = {
+        "tier1_success": tier_counts["tier1_success"],
+        "tier2_success": tier_counts["tier2_success"],
+        "tier1_fails": total_processed - len(valid_results),
+        "rate_limited": max(0, len(product_urls) - total_processed)
+    }
 
-            print(f"📈 Need {additional_needed} more results. Processing {len(additional_urls)} additional URLs...")
+    return state
 
-            # Process additional URLs
-            additional_tasks = []
-            search_query = state.get("enhanced_query", state["request"].query)
-            for url_info in additional_urls:
-                additional_tasks.append(_extract_from_url(url_info, client, search_query))
 
-            additional_results = await asyncio.gather(*additional_tasks)
+def _dedupe_urls(url_infos: List[Dict]) -> List[Dict]:
+    """Drop URLs that point at the same page as an earlier one (tracking parameters, fragments, host case)."""
+    seen = set()
+    unique = []
+    for url_info in url_infos:
+        key = _canonical_url(url_info["url"])
+        if key in seen:
+            log.debug("♻️ Skipping duplicate URL for %s: %s", url_info["domain"], url_info["url"])
+            continue
+        seen.add(key)
+        unique.append(url_info)
+    return unique
+
+
+def _canonical_url(url: str) -> str:
+    """Normalize a URL for duplicate detection: lowercase scheme/host, no fragment, no tracking parameters."""
+    parts = urlsplit(url.strip())
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAM_RE.match(key)
+    ])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", query, ""))
+
+
+def _record_result(entry: Optional[Tuple[str, ProductResult]], valid_results: List, captcha_sites: Set[str],
+                   tier_counts: Dict[str, int]):
+    """
+    Classify one (tier, result) extraction as soon as it arrives, filtering out CAPTCHA-protected sites.
 
-            # Add successful additional results
-            for result in additional_results:
-                if result and result.get("product_name") != "unknown":
-                    if not any(site in result.get("site_name", "") for site in captcha_sites):
-                        valid_results.append(result)
-                        print(f"✅ Additional extraction: {result['product_name']} from {result['site_name']}")
+    Only kept results are counted against their tier. The graph state is not touched here:
+    llm_extraction_agent publishes results and tier_stats once at the end.
+    """
+    if entry is None:
+        return
+    tier, result = entry
+    if not result or result.product_name == "unknown" or result.site_name in captcha_sites:
+        return
+
+    # Check if result indicates CAPTCHA protection
+    if _is_captcha_protected(result):
+        captcha_sites.add(result.site_name)
+        _captcha_domains.set(result.site_name, True)
+        log.info("🚫 Filtered out %s: CAPTCHA protection detected", result.site_name)
+    elif _BOT_WALL_HINT_RE.search(result.availability):
+        log.info("🚫 Filtered out %s result: possible bot-check page (%s)", result.site_name, result.product_name)
+    else:
+        valid_results.append(result)
+        tier_counts[tier] = tier_counts.get(tier, 0) + 1
+        log.debug("✅ Successfully extracted from %s: %s - %s%s", result.site_name, result.product_name, result.currency, result.price)
 
-            print(f"📊 After additional processing: {len(valid_results)} total results")
 
-    # Update tier stats to reflect rate limiting
-    total_processed = len(urls_to_process) + len(additional_urls)
-    state["tier_stats"] = {
-        "tier2_success": len(valid_results),
-        "tier1_fails": total_processed - len(valid_results),
-        "rate_limited": max(0, len(state["product_urls"]) - total_processed)
-    }
+async def _extract_from_urls(url_infos: List[Dict], search_query: str) -> AsyncIterator:
+    """Helper to fetch and extract several URLs concurrently, yielding each (tier, result) (or None) as soon as it completes."""
+    tasks = [asyncio.create_task(_extract_from_url(url_info, search_query)) for url_info in url_infos]
+    try:
+        for next_result in asyncio.as_completed(tasks, timeout=settings.EXTRACTION_BATCH_TIMEOUT):
+            try:
+                yield await next_result
+            except TimeoutError:
+                raise
+            except Exception as e:
+                # One site's failure must not cancel the others still in flight
+                log.warning("❌ Extraction task failed: %s", e)
+                yield None
+    except TimeoutError:
+        pending = sum(not task.done() for task in tasks)
+        log.warning("⏱️ Extraction batch timed out after %ds with %d sites still pending", settings.EXTRACTION_BATCH_TIMEOUT, pending)
+    finally:
+        # The consumer stopped early (or failed): don't leave fetches running in the background
+        for task in tasks:
+            task.cancel()
+
+
+async def _extract_from_url(url_info: Dict, search_query: str) -> Optional[Tuple[str, ProductResult]]:
+    """Helper to extract one product page, returning the tier that answered it alongside the result."""
+    if _captcha_domains.get(url_info["domain"]):
+        log.info("🚫 Skipping %s: CAPTCHA protection detected recently", url_info["domain"])
+        return None
 
-    return state
+    return await _fetch_and_extract(url_info["url"], url_info["domain"], search_query)
+
+
+def _dump_tiered_result(entry: Tuple[str, ProductResult]) -> bytes:
+    """Serialize a (tier, ProductResult) cache entry."""
+    tier, result = entry
+    return orjson.dumps([tier, result.model_dump()])
+
+
+def _load_tiered_result(data: bytes) -> Tuple[str, ProductResult]:
+    """Deserialize a (tier, ProductResult) cache entry into a fresh ProductResult."""
+    tier, result = orjson.loads(data)
+    return tier, ProductResult.model_validate(result)
+
+
+# Re-running a search within minutes reuses the extraction without re-fetching the page;
+# prices move, so the window is kept short
+@async_lru(
+    maxsize=1024,
+    ttl=settings.EXTRACTION_CACHE_TTL_SECONDS,
+    persist=False,
+    dumps=_dump_tiered_result,
+    loads=_load_tiered_result,
+)
+async def _fetch_and_extract(url: str, domain: str, search_query: str) -> Optional[Tuple[str, ProductResult]]:
+    """
+    Fetch one product page and extract it.
+
+    Tier 1 reads the page's JSON-LD structured data; only pages without a usable Product
+    block go to the LLM (Tier 2), where concurrent extractions still share one batch.
+
+    Returns:
+        Tuple of (tier_stats key of the tier that answered, ProductResult), or None on failure
+    """
+    # Wait for the domain's slot before taking a global one, so a busy retailer doesn't starve the others
+    async with _host_semaphore(domain), _fetch_semaphore:
+        html = await _fetch_html(url, domain)
+    if not html:
+        return None
 
+    result = extract_from_json_ld(html, domain, search_query)
+    if result:
+        result.link = url  # Set the actual product URL
+        log.debug("⚡ Structured data extraction for %s: %s", domain, result.product_name)
+        return "tier1_success", result
 
-async def _extract_from_url(url_info: Dict, client: httpx.AsyncClient, search_query: str = ""):
-    """Helper to fetch HTML and extract product data using LLM."""
     try:
-        domain = url_info["domain"]
-        url = url_info["url"]
+        result = await extract_from_html(html, domain, search_query)
+    except Exception as e:
+        log.warning("❌ LLM extraction failed for %s: %s", domain, e)
+        return None
+
+    if not result:
+        log.debug("❌ LLM extraction failed for %s: No matching product found", domain)
+        return None
 
-        print(f"🌐 Fetching from {domain}...")
-        response = await client.get(url, follow_redirects=True, timeout=30)  # Increased timeout
-        response.raise_for_status()
+    result.link = url  # Set the actual product URL
+    log.debug("🤖 LLM extraction completed for %s: %s", domain, result.product_name)
+    return "tier2_success", result
 
-        print(f"📄 Received {len(response.text)} characters from {domain}")
 
-        # Use LLM to extract product information with search query context
-        result = await extract_from_html(response.text, domain, search_query)
-        if result:
-            result.link = url  # Set the actual product URL
-            print(f"🤖 LLM extraction completed for {domain}: {result.product_name}")
-            return result
-        else:
-            print(f"❌ LLM extraction failed for {domain}: No matching product found")
-            return None
+def _host_semaphore(domain: str) -> asyncio.Semaphore:
+    """Return the fetch semaphore for a domain, creating it if no fetch to that domain is in flight."""
+    semaphore = _host_semaphores.get(domain)
+    if semaphore is None:
+        semaphore = _host_semaphores[domain] = asyncio.Semaphore(settings.MAX_CONCURRENT_FETCHES_PER_HOST)
+    return semaphore
+
+
+async def _fetch_html(url: str, domain: str) -> Optional[str]:
+    """Helper to fetch the HTML of a product page over the shared client, reading at most FETCH_MAX_HTML_BYTES of the body."""
+    try:
+        log.debug("🌐 Fetching from %s...", domain)
+        # Stream so MB-scale pages are cut off early instead of downloaded, parsed and shipped to the HTML pool whole
+        async with get_http_client().stream("GET", url, follow_redirects=True, timeout=30) as response:  # Increased timeout
+            response.raise_for_status()
+
+            # PDFs, images and JSON APIs can't be product pages; skip them before reading the body
+            content_type = response.headers.get("content-type", "")
+            if content_type and "html" not in content_type.lower():
+                log.info("🚫 Skipping %s: not an HTML page (%s)", domain, content_type)
+                return None
+
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) >= settings.FETCH_MAX_HTML_BYTES:
+                    log.info("✂️ Truncating page from %s at %d bytes", domain, settings.FETCH_MAX_HTML_BYTES)
+                    break
+
+        html = body[:settings.FETCH_MAX_HTML_BYTES].decode(response.encoding or "utf-8", errors="replace")
+        log.debug("📄 Received %d characters from %s", len(html), domain)
+        return html
 
     except Exception as e:
-        print(f"❌ Failed to fetch/extract from {domain}: {e}")
+        log.warning("❌ Failed to fetch from %s: %s", domain, e)
         return None
 
 
@@ -228,20 +379,7 @@ def _is_captcha_protected(result) -> bool:
     if not result:
         return False
 
-    captcha_indicators = [
-        "captcha",
-        "verification",
-        "robot",
-        "automated",
-        "suspicious activity",
-        "verify you are human",
-        "security check",
-        "please complete",
-        "prove you're not a robot"
-    ]
-
-    text_to_check = f"{result.product_name} {result.availability}".lower()
-    return any(indicator in text_to_check for indicator in captcha_indicators)
+    return bool(_CAPTCHA_RE.search(f"{result.product_name} {result.availability}"))
 
 
 # Helper function removed - now using proper tiered approach
@@ -249,43 +387,43 @@ def _is_captcha_protected(result) -> bool:
 
 async def consolidation_agent(state: GraphState) -> GraphState:
     """AGENT: Consolidate and deduplicate results from LLM extraction."""
-    print("---AGENT: Consolidation---")
+    log.info("---AGENT: Consolidation---")
 
     # Results are already in final_results from LLM extraction
     all_results = state["final_results"]
 
-    print(f"📦 Processing {len(all_results)} extracted products...")
+    log.info("📦 Processing %d extracted products...", len(all_results))
 
     if not all_results:
-        print("❌ No products to consolidate")
+        log.info("❌ No products to consolidate")
         return state
 
     # Log all products before deduplication
-    print(f"🔍 Products before deduplication:")
-    for i, product in enumerate(all_results, 1):
-        print(f"   {i}. {product.site_name}: {product.product_name} - {product.currency}{product.price}")
-
-    # More intelligent deduplication - keep results from different sites even if product name is similar
-    unique_results = []
-    seen_combinations = set()
-
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("🔍 Products before deduplication:")
+        for i, product in enumerate(all_results, 1):
+            log.debug("   %d. %s: %s - %s%s", i, product.site_name, product.product_name, product.currency, product.price)
+
+    # More intelligent deduplication - keep results from different sites even if product name is similar.
+    # One pass keeps the cheapest listing per (product name, site) rather than whichever arrived first
+    cheapest = {}
     for product in all_results:
-        # Create a key that includes both product name and site to avoid over-deduplication
-        key = f"{product.product_name.lower().strip()}_{product.site_name}"
-        if key not in seen_combinations:
-            seen_combinations.add(key)
-            unique_results.append(product)
+        key = (product.product_name.casefold().strip(), product.site_name)
+        current = cheapest.get(key)
+        if current is None or product.price < current.price:
+            cheapest[key] = product
+    unique_results = cheapest.values()
 
-    duplicates_removed = len(all_results) - len(unique_results)
+    duplicates_removed = len(all_results) - len(cheapest)
     if duplicates_removed > 0:
-        print(f"🔄 Removed {duplicates_removed} exact duplicate products")
+        log.info("🔄 Removed %d exact duplicate products", duplicates_removed)
 
     # Final deterministic sort by price
-    sorted_results = sorted(unique_results, key=lambda p: p.price)
+    sorted_results = sorted(unique_results, key=attrgetter("price"))
     state["final_results"] = sorted_results
 
-    print(f"✅ Final Results ({len(sorted_results)} products, sorted by price):")
+    log.info("✅ Final Results (%d products, sorted by price):", len(sorted_results))
     for i, product in enumerate(sorted_results, 1):
-        print(f"   {i}. {product.currency}{product.price} - {product.product_name} ({product.site_name})")
+        log.debug("   %d. %s%s - %s (%s)", i, product.currency, product.price, product.product_name, product.site_name)
 
     return state
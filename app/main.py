@@ -5,14 +5,24 @@ This module sets up the FastAPI application with a clean functional architecture
 All business logic is handled by services, and routers only handle HTTP concerns.
 """
 
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
+
+# Configure logging before importing the agents, which log while initializing
+from app.utils.logging_config import setup_logging
+setup_logging(settings.LOG_LEVEL)
+
 from app.services import price_comparison_service
 from app.routers import search, health
+from app.utils.http_client import close_http_client
+from app.utils.process_pool import get_process_pool, shutdown_process_pool
+
+log = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -23,13 +33,16 @@ async def lifespan(app: FastAPI):
     Handles service initialization on startup and cleanup on shutdown.
     """
     # Startup
-    print("Initializing Price Comparison Service...")
+    log.info("Initializing Price Comparison Service...")
+    get_process_pool()
     await price_comparison_service.initialize()
-    print("Service initialized successfully.")
+    log.info("Service initialized successfully.")
     yield
 
     # Shutdown
-    print("Application shutting down.")
+    log.info("Application shutting down.")
+    await close_http_client()
+    shutdown_process_pool()
 
 
 # Create FastAPI app
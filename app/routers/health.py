@@ -9,6 +9,8 @@ from fastapi import APIRouter
 from app import __version__
 from app.services.price_comparison_service import get_health_status
 from app.utils.rate_limiter import gemini_rate_limiter
+from app.agents.llm_agents import get_llm_cache_stats
+from app.core.cache import get_memory_cache_stats
 from app.config import settings
 
 
@@ -46,10 +48,25 @@ async def rate_limit_status() -> Dict[str, Any]:
         "rate_limited": len(recent_requests) >= settings.GEMINI_RATE_LIMIT_PER_MINUTE,
         "max_sites_per_request": settings.MAX_SITES_TO_EXTRACT,
         "static_cache_enabled": settings.ENABLE_STATIC_SITE_CACHE,
+        "llm_cache": get_llm_cache_stats(),
         "optimization_status": "Optimized for Gemini free tier (10 req/min)"
     }
 
 
+@router.get("/cache-stats")
+async def cache_stats() -> Dict[str, Any]:
+    """
+    Report hit/miss statistics for the in-process caches on the search path.
+
+    Returns:
+        Dictionary with size, capacity, hits and misses per cache
+    """
+    return {
+        "llm_responses": get_llm_cache_stats(),
+        **get_memory_cache_stats(),
+    }
+
+
 @router.get("/")
 async def root() -> Dict[str, Any]:
     """
@@ -65,6 +82,7 @@ async def root() -> Dict[str, Any]:
         "endpoints": {
             "search": "/lp/search",
             "health": "/lp/health",
+            "cache_stats": "/lp/cache-stats",
             "docs": "/lp/docs",
             "redoc": "/lp/redoc"
         },
@@ -19,7 +19,7 @@ async def search_products(request: ProductSearchRequest):
     This endpoint orchestrates the entire price comparison workflow:
     1. Site selection and caching
     2. Query enhancement
-    3. Multi-tier scraping (BeautifulSoup + LLM fallback)
+    3. Multi-tier extraction (JSON-LD structured data + LLM fallback)
     4. Result consolidation and deduplication
     5. Price-based sorting
 
@@ -8,6 +8,8 @@ from typing import Dict, Any
 from app import __version__
 from app.models import ProductSearchRequest, SearchResponse, GraphState
 from app.core.workflow import create_workflow
+from app.agents.llm_agents import request_extraction_scope, warmup
+from app.config import settings
 
 
 # Global workflow instance
@@ -20,6 +22,8 @@ async def initialize():
     global _workflow, _initialized
     if not _initialized:
         _workflow = create_workflow()
+        if settings.LLM_WARMUP:
+            await warmup()
         _initialized = True
 
 
@@ -56,11 +60,12 @@ async def search_products(request: ProductSearchRequest) -> SearchResponse:
         product_urls=[],           # Discovered product URLs from SerpAPI
         final_results=[],          # All results go directly here from LLM extraction
         errors=[],
-        tier_stats={"tier2_success": 0, "tier1_fails": 0}  # Only track LLM extraction stats
+        tier_stats={"tier1_success": 0, "tier2_success": 0, "tier1_fails": 0}  # Structured-data and LLM extraction stats
     )
 
     # Execute the workflow
-    final_state = await _workflow.ainvoke(initial_state, {"recursion_limit": 10})
+    with request_extraction_scope():
+        final_state = await _workflow.ainvoke(initial_state, {"recursion_limit": 10})
 
     # Calculate metrics
     search_time_ms = int((asyncio.get_event_loop().time() - start_time) * 1000)
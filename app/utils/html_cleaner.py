@@ -3,8 +3,38 @@ HTML preprocessing utility for LLM extraction.
 Cleans and simplifies HTML content to make it easier for LLMs to parse.
 """
 
+import json
+import logging
 import re
-from bs4 import BeautifulSoup
+from typing import Optional
+
+import lxml.html
+from lxml import etree
+
+from app.utils.token_truncate import estimate_tokens
+
+log = logging.getLogger(__name__)
+
+# Elements and recommendation/related-product sections that both LLM views discard
+_DROP_XPATH = '//script | //style | //noscript | //nav | //footer | //iframe | //svg'
+_NOISE_RE = re.compile(r'recommend|related|similar|also-bought|customers-also|suggestions|carousel', re.I)
+
+# Flat JSON representation settings
+_FLAT_JSON_SALIENT_RE = re.compile(r'price|title|name|availability|stock', re.I)
+_FLAT_JSON_PRICE_RE = re.compile(r'[\$£€₹¥]\s*[\d,]+\.?\d*|[\d,]+\.?\d*\s*(USD|GBP|EUR|INR|CAD|AUD)')
+
+# Marker-text (preprocess_html_for_llm) settings
+_MAIN_ID_RE = re.compile(r'main|content|body|product', re.I)
+_MAIN_CLASS_RE = re.compile(r'product-detail|pdp|product-info|main-content', re.I)
+_HINT_TAGS = ('h1', 'h2', 'h3', 'span', 'div', 'p', 'li', 'b', 'strong')
+_PRICE_CANDIDATE_RE = re.compile(r'[\$£€₹¥][\d,]+\.?\d*|[\d,]+\.?\d*\s*(USD|GBP|EUR|INR|CAD|AUD)')
+_DIGIT_OR_CURRENCY_RE = re.compile(r'[\d₹$£€]')
+# Keyword sets matched as one alternation per check (attribute strings are lowercased before matching)
+_PRICE_ATTR_RE = re.compile(r'price|cost|amount|offer|money|dollar')
+_TITLE_ATTR_RE = re.compile(r'title|name|heading|brand|product')
+_STOCK_ATTR_RE = re.compile(r'stock|availab|inventory')
+_COMMERCE_WORD_RE = re.compile(r'product|item|buy|add|cart|price|offer|sale|discount', re.I)
+_BOILERPLATE_TEXT_RE = re.compile(r'cookie|privacy policy|terms of service|newsletter', re.I)
 
 
 def preprocess_html_for_llm(html: str) -> str:
@@ -18,151 +48,255 @@ def preprocess_html_for_llm(html: str) -> str:
     Returns:
         Cleaned and simplified text with semantic hints
     """
-    if not html:
+    root = _parse_and_strip(html)
+    if root is None:
         return ""
-        
-    soup = BeautifulSoup(html, 'lxml')
-
-    # 1. Remove only the most problematic tags, keep more content
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-
-    # Be more selective about what we remove
-    for tag in soup(["nav", "footer", "iframe"]):
-        tag.decompose()
-
-    # 2. Remove recommendation/related product sections that confuse the LLM
-    for tag in soup(class_=re.compile(r'recommend|related|similar|also-bought|customers-also|suggestions|carousel', re.I)):
-        tag.decompose()
-    for tag in soup(id=re.compile(r'recommend|related|similar|also-bought|customers-also|suggestions|carousel', re.I)):
-        tag.decompose()
-
-    # 3. Heuristically find the main content area to focus on
-    main_content = (
-        soup.find('main') or
-        soup.find(id=re.compile(r'main|content|body|product', re.I)) or
-        soup.find(class_=re.compile(r'product-detail|pdp|product-info|main-content', re.I)) or
-        soup.body
-    )
-    if not main_content:
+    return _marker_text(root)
+
+
+def _marker_text(root) -> str:
+    """Build the marker-text view of a page tree already cleaned by _parse_and_strip."""
+    # 1. Heuristically find the main content area to focus on
+    # (iter(etree.Element) skips comments and processing instructions, which have no attributes)
+    main_content = _first(root.iter('main'))
+    if main_content is None:
+        main_content = _first(e for e in root.iter(etree.Element) if _MAIN_ID_RE.search(e.get('id', '')))
+    if main_content is None:
+        main_content = _first(e for e in root.iter(etree.Element) if _MAIN_CLASS_RE.search(e.get('class', '')))
+    if main_content is None:
+        main_content = root.find('body')
+    if main_content is None:
         return ""  # Return empty if no body content
 
-    # 4. Add semantic hints to the text of remaining elements - prioritize main product info
+    # 2. Add semantic hints to the text of remaining elements - prioritize main product info
     simplified_text = []
 
     # First, look for the main product title (usually H1)
-    main_title = main_content.find('h1')
-    if main_title:
-        title_text = main_title.get_text(strip=True)
+    main_title = main_content.find('.//h1')
+    if main_title is not None:
+        title_text = _element_text(main_title, '')
         if title_text:
             simplified_text.append(f"[MAIN PRODUCT TITLE]: {title_text}")
 
     # Then process other elements
-    for element in main_content.find_all(['h1', 'h2', 'h3', 'span', 'div', 'p', 'li', 'b', 'strong']):
-        text = element.get_text(separator=' ', strip=True)
+    for element in main_content.iterdescendants(*_HINT_TAGS):
+        text = _element_text(element)
         if not text or len(text) < 3:
             continue
 
         # Skip if this is the main title we already added
-        if element == main_title:
+        if element is main_title:
             continue
 
         # Combine class and id for keyword searching
-        attrs_str = ' '.join(element.get('class', [])) + ' ' + element.get('id', '')
+        attrs_str = f"{element.get('class', '')} {element.get('id', '')}".lower()
 
         # Add hints based on attributes - this is crucial for the LLM
-        if any(keyword in attrs_str.lower() for keyword in ['price', 'cost', 'amount', 'offer', 'money', 'dollar']):
+        if _PRICE_ATTR_RE.search(attrs_str):
             simplified_text.append(f"[PRICE HINT]: {text}")
-        elif any(keyword in attrs_str.lower() for keyword in ['title', 'name', 'heading', 'brand', 'product']) and element.name in ['h1', 'h2']:
+        elif element.tag in ('h1', 'h2') and _TITLE_ATTR_RE.search(attrs_str):
             simplified_text.append(f"[PRODUCT TITLE]: {text}")
-        elif element.name in ['h2', 'h3'] and len(text) > 10:
-            simplified_text.append(f"[HEADER {element.name.upper()}]: {text}")
-        elif any(keyword in attrs_str.lower() for keyword in ['stock', 'availability', 'available', 'inventory']):
+        elif element.tag in ('h2', 'h3') and len(text) > 10:
+            simplified_text.append(f"[HEADER {element.tag.upper()}]: {text}")
+        elif _STOCK_ATTR_RE.search(attrs_str):
             simplified_text.append(f"[AVAILABILITY HINT]: {text}")
         else:
             # Be more lenient with text inclusion, especially for prices
             if len(text) >= 3 and len(text) <= 300:
                 # Always include text with currency symbols or price patterns
-                if re.search(r'[\$£€₹¥][\d,]+\.?\d*|[\d,]+\.?\d*\s*(USD|GBP|EUR|INR|CAD|AUD)', text):
+                if _PRICE_CANDIDATE_RE.search(text):
                     simplified_text.append(f"[PRICE CANDIDATE]: {text}")
                 # Include if it has numbers, currency symbols, or key e-commerce words
-                elif (re.search(r'[\d₹$£€]', text) or
-                      any(word in text.lower() for word in ['product', 'item', 'buy', 'add', 'cart', 'price', 'offer', 'sale', 'discount'])):
+                elif (_DIGIT_OR_CURRENCY_RE.search(text) or
+                      _COMMERCE_WORD_RE.search(text)):
                     simplified_text.append(text)
 
-    # 5. Join the text lines and limit the size
+    # 3. Join the text lines and limit the size
     final_text = '\n'.join(simplified_text)
 
     # If we got very little content, try a much more lenient approach
     if len(final_text) < 1000:
-        print(f"⚠️ HTML cleaning produced only {len(final_text)} chars, trying fallback approach...")
+        log.debug("⚠️ HTML cleaning produced only %d chars, trying fallback approach...", len(final_text))
         # Fallback: get all text content with minimal filtering
         fallback_text = []
-        for element in main_content.find_all(text=True):
-            text = element.strip()
+        for text in main_content.itertext():
+            text = text.strip()
             if text and len(text) > 2 and not text.isspace():
                 # Skip only obvious navigation/footer content
-                if not any(skip in text.lower() for skip in ['cookie', 'privacy policy', 'terms of service', 'newsletter']):
+                if not _BOILERPLATE_TEXT_RE.search(text):
                     fallback_text.append(text)
 
         fallback_content = '\n'.join(fallback_text[:200])  # Take first 200 text nodes
         if len(fallback_content) > len(final_text):
             final_text = fallback_content
-            print(f"✅ Fallback approach produced {len(final_text)} chars")
+            log.debug("✅ Fallback approach produced %d chars", len(final_text))
 
     return final_text[:12000]  # Increased to 12k chars for better coverage
 
 
-def extract_product_hints(html: str) -> dict:
+def _flat_json(root, max_items: int = 120, max_tokens: Optional[int] = None) -> str:
     """
-    Extract specific product information hints from HTML structure.
-    
+    Build a flat JSON object mapping XPaths to the text of product-relevant elements.
+
+    Only headings, elements whose class/id/itemprop mention price, title, name or
+    availability, and elements whose own text contains a price are kept. When the main
+    title (h1) and a price share a nearby ancestor, only that snippet of the page is
+    used, so related-product prices elsewhere on the page never reach the LLM.
+
     Args:
-        html: Raw HTML content
-        
+        root: Page tree already cleaned by _parse_and_strip
+        max_items: Maximum number of elements to emit
+        max_tokens: Token budget; elements that don't fit are left out whole, so the result stays valid JSON
+
     Returns:
-        Dictionary with extracted hints
+        JSON string, or an empty string if no price-like value was found (or none fits the budget)
     """
+    tree = root.getroottree()
+    # Structured-data meta tags usually sit in <head>, outside any snippet
+    meta_elements = root.xpath('//meta[@itemprop and @content]')
+
+    snippet = _product_snippet(root)
+    flat, price_paths = _collect_flat_items(tree, meta_elements + list(snippet.iter()), max_items)
+    if not price_paths and snippet is not root:
+        flat, price_paths = _collect_flat_items(tree, root.iter(), max_items)
+
+    if max_tokens is not None:
+        flat = _fit_flat_items(flat, price_paths, max_tokens)
+    # The caller skips its own price check for flat JSON, so a view whose prices were cut is not returned
+    if not price_paths.intersection(flat):
+        return ""
+    return json.dumps(flat, ensure_ascii=False)
+
+
+def _fit_flat_items(flat: dict, price_paths: set, max_tokens: int) -> dict:
+    """
+    Keep the {xpath: text} pairs whose serialized form fits max_tokens, in document order.
+
+    Price-like pairs claim the budget first, then the rest are added in document order
+    (snippet elements come first), so a long run of names can't push the price out.
+    """
+    used = 1  # The enclosing braces
+    fits = set()
+    for pass_paths in ([p for p in flat if p in price_paths], [p for p in flat if p not in price_paths]):
+        for path in pass_paths:
+            item = f"{json.dumps(path, ensure_ascii=False)}: {json.dumps(flat[path], ensure_ascii=False)}, "
+            cost = estimate_tokens(item)
+            if used + cost > max_tokens:
+                break
+            used += cost
+            fits.add(path)
+    return {path: text for path, text in flat.items() if path in fits}
+
+
+def prepare_html_for_llm(html: str, max_tokens: Optional[int] = None) -> tuple:
+    """
+    Produce the LLM view of a page: compact flat JSON when a price was found, marker text otherwise.
+
+    Kept at module level (and free of closures) so it can be shipped to a process pool.
+
+    Args:
+        html: Raw HTML content from a webpage
+        max_tokens: Token budget for the flat JSON view (marker text is windowed by the caller)
+
+    Returns:
+        Tuple of (content, is_flat_json, heading), heading being the page's <title> and first h1
+    """
+    # Both views start from the same cleaned tree, so the page is parsed once
+    root = _parse_and_strip(html)
+    if root is None:
+        return "", False, ""
+    heading = _page_heading(root)
+    flat_json = _flat_json(root, max_tokens=max_tokens)
+    if flat_json:
+        return flat_json, True, heading
+    return _marker_text(root), False, heading
+
+
+def _page_heading(root) -> str:
+    """The page's <title> and first h1 text, where error and interstitial pages announce themselves."""
+    elements = (root.find('.//title'), _first(root.iter('h1')))
+    parts = [_element_text(element) for element in elements if element is not None]
+    return '\n'.join(part for part in parts if part)
+
+
+def _parse_and_strip(html: str):
+    """Parse a page and drop script/style/navigation elements and recommendation sections; None if unparseable."""
     if not html:
-        return {}
-        
-    soup = BeautifulSoup(html, 'lxml')
-    hints = {}
-    
-    # Look for common e-commerce patterns
-    price_selectors = [
-        '[class*="price"]',
-        '[id*="price"]',
-        '.price-current',
-        '.price-now',
-        '.sale-price',
-        '.offer-price'
-    ]
-    
-    title_selectors = [
-        'h1',
-        '[class*="title"]',
-        '[class*="name"]',
-        '[id*="title"]',
-        '[id*="name"]'
-    ]
-    
-    # Extract price hints
-    for selector in price_selectors:
-        elements = soup.select(selector)
-        for elem in elements:
-            text = elem.get_text(strip=True)
-            if text and re.search(r'[\d,]+\.?\d*', text):
-                hints['price_candidates'] = hints.get('price_candidates', [])
-                hints['price_candidates'].append(text)
-    
-    # Extract title hints
-    for selector in title_selectors:
-        elements = soup.select(selector)
-        for elem in elements:
-            text = elem.get_text(strip=True)
-            if text and len(text) > 5:
-                hints['title_candidates'] = hints.get('title_candidates', [])
-                hints['title_candidates'].append(text)
-    
-    return hints
+        return None
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+    # The parent-less <html> root can't be dropped, and a noisy class on <body> would empty the page
+    for element in root.xpath(_DROP_XPATH):
+        if element.getparent() is not None:
+            element.drop_tree()
+    # Recommendation/related product sections carry other products' prices that confuse the LLM
+    for element in root.xpath('//*[@class or @id]'):
+        if element.getparent() is None or element.tag == 'body':
+            continue
+        if _NOISE_RE.search(f"{element.get('class', '')} {element.get('id', '')}"):
+            element.drop_tree()
+    return root
+
+
+def _first(elements):
+    """Return the first element of an iterable, or None if it is empty."""
+    return next(iter(elements), None)
+
+
+def _element_text(element, separator: str = ' ') -> str:
+    """An element's stripped text fragments joined by separator (BeautifulSoup's get_text(separator, strip=True))."""
+    return separator.join(text.strip() for text in element.itertext() if text.strip())
+
+
+def _product_snippet(root, max_height: int = 4):
+    """Return the closest ancestor of the main h1 (up to max_height levels) that contains a price."""
+    titles = root.xpath('//h1')
+    if not titles:
+        return root
+
+    node = titles[0]
+    for _ in range(max_height):
+        node = node.getparent()
+        if node is None:
+            break
+        if _FLAT_JSON_PRICE_RE.search(node.text_content()):
+            return node
+    return root
+
+
+def _collect_flat_items(tree, elements, max_items: int) -> tuple:
+    """Collect {xpath: text} pairs for product-relevant elements, and the xpaths of those that look like a price."""
+    flat = {}
+    seen_texts = set()
+    price_paths = set()
+
+    for element in elements:
+        if not isinstance(element.tag, str):
+            continue  # Comments and processing instructions
+
+        attrs = f"{element.get('class', '')} {element.get('id', '')} {element.get('itemprop', '')}"
+        if element.get('itemprop') and element.get('content'):
+            text = element.get('content').strip()
+        elif element.tag in ('h1', 'h2') or _FLAT_JSON_SALIENT_RE.search(attrs):
+            text = ' '.join(element.text_content().split())
+        else:
+            text = (element.text or '').strip()
+            if not _FLAT_JSON_PRICE_RE.search(text):
+                continue
+
+        # Skip empty values, large containers (their children are visited anyway) and repeats
+        if len(text) < 2 or len(text) > 300 or text in seen_texts:
+            continue
+        seen_texts.add(text)
+
+        path = tree.getpath(element).replace('/html/body', '', 1)
+        flat[path] = text
+        if _FLAT_JSON_PRICE_RE.search(text) or 'price' in attrs.lower():
+            price_paths.add(path)
+        if len(flat) >= max_items:
+            break
+
+    return flat, price_paths
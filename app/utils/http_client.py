@@ -0,0 +1,38 @@
+"""
+Shared outbound HTTP client.
+
+One keep-alive, HTTP/2-capable connection pool is reused across requests, so repeat
+fetches from the same retailer skip the TCP and TLS handshakes and concurrent fetches
+to one host multiplex over a single connection.
+"""
+
+from typing import Optional
+
+import httpx
+
+_DEFAULT_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            # Keep idle connections for 30s (httpx default: 5s) so back-to-back searches reuse them
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128, keepalive_expiry=30),
+            # Re-dial on connect errors (DNS hiccups, refused/reset during handshake); requests are never resent
+            retries=2,
+        )
+        _client = httpx.AsyncClient(transport=transport, headers=_DEFAULT_HEADERS, timeout=30)
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client and release its connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,148 @@
+"""
+Structured-data (schema.org JSON-LD) product extraction.
+
+Most retailers embed a Product/Offer block in a <script type="application/ld+json"> tag
+for search engines. When it carries a name and a price, the page can be answered without
+an LLM call.
+"""
+
+import re
+from typing import Any, Dict, Iterator, Optional
+
+import orjson
+
+_LDJSON_RE = re.compile(r'<script[^>]+application/ld\+json[^>]*>(.*?)</script>', re.S | re.I)
+_PRICE_NUMBER_RE = re.compile(r'\d[\d.,]*')
+
+# schema.org ItemAvailability values, compared on the part after the last slash
+_AVAILABILITY = {
+    'instock': 'in-stock',
+    'instoreonly': 'in-stock',
+    'onlineonly': 'in-stock',
+    'limitedavailability': 'in-stock',
+    'preorder': 'pre-order',
+    'presale': 'pre-order',
+    'backorder': 'backorder',
+    'outofstock': 'out-of-stock',
+    'soldout': 'out-of-stock',
+    'discontinued': 'out-of-stock',
+}
+
+
+def extract_json_ld_product(html: str) -> Optional[Dict[str, Any]]:
+    """
+    Find the first schema.org Product with a name and a positive price in the page's JSON-LD blocks.
+
+    Args:
+        html: Raw HTML content from a webpage
+
+    Returns:
+        Dictionary with product_name, price, currency and availability, or None if the
+        page has no usable structured data
+    """
+    if not html or 'ld+json' not in html:
+        return None
+
+    for match in _LDJSON_RE.finditer(html):
+        try:
+            data = orjson.loads(match.group(1).strip())
+        except orjson.JSONDecodeError:
+            continue  # Hand-written blocks with trailing commas or raw newlines
+
+        for node in _iter_nodes(data):
+            if not _has_type(node, 'Product'):
+                continue
+            product = _product_fields(node)
+            if product:
+                return product
+
+    return None
+
+
+def _iter_nodes(data: Any) -> Iterator[Dict[str, Any]]:
+    """Yield every JSON object in a JSON-LD document, including @graph members and nested values."""
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            yield item
+            stack.extend(value for value in item.values() if isinstance(value, (dict, list)))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+
+
+def _has_type(node: Dict[str, Any], type_name: str) -> bool:
+    """Check a node's @type, which may be a string or a list and may carry a schema.org prefix."""
+    types = node.get('@type')
+    if not isinstance(types, list):
+        types = [types]
+    return any(isinstance(t, str) and t.rsplit('/', 1)[-1] == type_name for t in types)
+
+
+def _product_fields(node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Read name, price, currency and availability from a Product node and its first priced offer."""
+    name = node.get('name')
+    if not isinstance(name, str) or not name.strip():
+        return None
+
+    offers = node.get('offers')
+    for offer in offers if isinstance(offers, list) else [offers]:
+        if not isinstance(offer, dict):
+            continue
+        # AggregateOffer lists a range; the lowest price is the one a shopper would pay
+        price = _parse_price(offer.get('price'))
+        if price is None:
+            price = _parse_price(offer.get('lowPrice'))
+        if price is None:
+            spec = offer.get('priceSpecification')
+            if isinstance(spec, list):
+                spec = spec[0] if spec else None
+            if isinstance(spec, dict):
+                price = _parse_price(spec.get('price'))
+                offer = {**spec, **offer}
+        if price is None or price <= 0:
+            continue
+
+        currency = offer.get('priceCurrency')
+        availability = str(offer.get('availability') or '').rsplit('/', 1)[-1].lower()
+        return {
+            'product_name': ' '.join(name.split()),
+            'price': price,
+            'currency': currency if isinstance(currency, str) and currency else 'unknown',
+            'availability': _AVAILABILITY.get(availability, 'unknown'),
+        }
+
+    return None
+
+
+def _parse_price(value: Any) -> Optional[float]:
+    """Convert a JSON-LD price (number or string such as "1,299.00", "1.299,00" or "1.299") to a float."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+
+    match = _PRICE_NUMBER_RE.search(value)
+    if not match:
+        return None
+    number = match.group().rstrip('.,')
+
+    # schema.org asks for a dot decimal, but European sites often emit their display format.
+    # With both separators the last one is the decimal; a lone separator repeated, or followed
+    # by exactly three digits, groups thousands.
+    last = max(number.rfind('.'), number.rfind(','))
+    if last != -1:
+        sep = number[last]
+        other = ',' if sep == '.' else '.'
+        if other in number:
+            number = number.replace(other, '').replace(sep, '.')
+        elif number.count(sep) > 1 or len(number) - last == 4:
+            number = number.replace(sep, '')
+        else:
+            number = number.replace(sep, '.')
+    try:
+        return float(number)
+    except ValueError:
+        return None
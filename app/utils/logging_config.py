@@ -0,0 +1,39 @@
+"""
+Logging configuration for the price comparison application.
+
+Records are pushed onto an in-memory queue and written to stderr by a background
+listener thread, so coroutines never block on stream writes.
+"""
+
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Union
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(level: Union[int, str] = logging.INFO) -> None:
+    """
+    Route all application logging through a queue drained by a background thread (idempotent).
+
+    Args:
+        level: Root log level, as a logging constant or a name such as "DEBUG"
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,74 @@
+"""
+Micro-batching for concurrent async requests.
+
+Items submitted within a short window are collected and handed to a batch handler in one
+call; each submitter gets its own result back through a Future. Used to turn several
+concurrent single-page extractions into one multi-page Gemini request.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+
+class MicroBatcher:
+    """Collects items for up to window_seconds (or max_batch_size items) and processes them together."""
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int,
+        window_seconds: float,
+    ):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self._pending: List[Tuple[Any, "asyncio.Future"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set["asyncio.Task"] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item for the next batch and wait for its result.
+
+        Args:
+            item: Item to pass to the batch handler
+
+        Returns:
+            The handler's result for this item; handler exceptions are raised here
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand the pending items to the handler as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, "asyncio.Future"]]):
+        """Run the handler and fan its results (or exception) back out to the submitters."""
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
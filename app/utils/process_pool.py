@@ -0,0 +1,36 @@
+"""
+Shared worker-process pool for CPU-bound HTML parsing.
+
+Workers are started with the spawn method rather than Linux's default fork: by the time
+the first page is parsed the parent already runs gRPC channels, the shared httpx client
+and the logging listener thread, none of which survive being forked. Spawned workers
+import only what the submitted function needs.
+
+Worker processes do not inherit the parent's logging setup, so records logged inside a
+worker (html_cleaner's debug lines) never reach the QueueHandler.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+from typing import Optional
+
+_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Return the process-wide pool, creating it on first use (normally at startup, from the lifespan)."""
+    global _pool
+    if _pool is None:
+        _pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_process_pool():
+    """Stop the worker processes, letting in-flight parses finish."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
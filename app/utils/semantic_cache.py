@@ -0,0 +1,80 @@
+"""
+Semantic cache for LLM responses.
+
+Texts are embedded as L2-normalised bags of word unigrams and bigrams and compared with
+cosine similarity, so inputs that differ only in casing, punctuation, whitespace or word
+order share one cached answer. Entries only match when they contain exactly the same set
+of word tokens: a single extra or changed word ("lg oled tv 65 inch" vs "... stand"),
+number ("iPhone 15" vs "iPhone 16") or price is always a miss.
+"""
+
+import math
+import re
+from collections import Counter, deque
+from typing import Any, Deque, Dict, FrozenSet, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+_MAX_ENTRIES_PER_TAG = 256
+
+# tag -> recent (vector, token set, value) entries
+_entries: Dict[str, Deque[Tuple[Dict[str, float], FrozenSet[str], Any]]] = {}
+
+
+def _embed(text: str) -> Tuple[Dict[str, float], FrozenSet[str]]:
+    """Embed text as a normalised sparse vector plus its set of word tokens."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = Counter(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+    norm = math.sqrt(sum(count * count for count in features.values()))
+    if not norm:
+        return {}, frozenset()
+
+    vector = {feature: count / norm for feature, count in features.items()}
+    return vector, frozenset(tokens)
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """Cosine similarity of two normalised sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(feature, 0.0) for feature, weight in a.items())
+
+
+def semantic_get(tag: str, text: str, threshold: float) -> Optional[Any]:
+    """
+    Look up the cached value whose text is most similar to the given text.
+
+    Args:
+        tag: Namespace for the lookup (e.g. call site and country)
+        text: Text to compare against cached entries
+        threshold: Minimum cosine similarity for a hit
+
+    Returns:
+        The cached value on a hit, None otherwise
+    """
+    entries = _entries.get(tag)
+    if not entries:
+        return None
+
+    vector, token_set = _embed(text)
+    if not vector:
+        return None
+
+    best_score, best_value = 0.0, None
+    for cached_vector, cached_token_set, value in entries:
+        if cached_token_set != token_set:
+            continue
+        score = _cosine(vector, cached_vector)
+        if score > best_score:
+            best_score, best_value = score, value
+
+    return best_value if best_score >= threshold else None
+
+
+def semantic_set(tag: str, text: str, value: Any) -> None:
+    """Store a value under the embedding of the given text."""
+    vector, token_set = _embed(text)
+    if not vector:
+        return
+    _entries.setdefault(tag, deque(maxlen=_MAX_ENTRIES_PER_TAG)).append((vector, token_set, value))
@@ -0,0 +1,60 @@
+"""
+Single-flight coalescing for concurrent async calls.
+
+When several coroutines ask for the same key at once, only the first one runs the work;
+the rest await its result. This keeps duplicate fan-out (same page, same country) from
+spending extra Gemini quota before the response cache has been populated.
+
+The shared work outlives any single cancelled caller, but is cancelled once every caller
+waiting on it has been cancelled, so abandoned fetches and LLM calls stop promptly.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Flight:
+    """One shared call and the number of callers currently awaiting it."""
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.waiters = 0
+
+
+_inflight: Dict[Hashable, _Flight] = {}
+
+
+async def single_flight(key: Hashable, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run coro_factory() once per key among concurrent callers and share its result.
+
+    Args:
+        key: Identity of the work (e.g. a hash of the rendered prompt)
+        coro_factory: Zero-argument callable returning the coroutine to run
+
+    Returns:
+        The result of the shared call; exceptions are propagated to every caller
+    """
+    flight = _inflight.get(key)
+    if flight is None:
+        flight = _inflight[key] = _Flight(asyncio.ensure_future(coro_factory()))
+        flight.task.add_done_callback(lambda _: _forget(key, flight))
+
+    flight.waiters += 1
+    try:
+        # Shield so one caller being cancelled doesn't cancel the work for the others
+        return await asyncio.shield(flight.task)
+    finally:
+        flight.waiters -= 1
+        if not flight.waiters and not flight.task.done():
+            # Every caller gave up: stop the work, and let the next caller start afresh
+            _forget(key, flight)
+            flight.task.cancel()
+
+
+def _forget(key: Hashable, flight: _Flight):
+    """Drop a finished or abandoned call from the in-flight table (unless a newer call took its key)."""
+    if _inflight.get(key) is flight:
+        del _inflight[key]
+
@@ -0,0 +1,40 @@
+"""
+Token-aware truncation for LLM prompts.
+
+Gemini's tokenizer is only reachable through a network call, so token counts are estimated
+locally: ASCII text averages about four characters per token, while non-ASCII characters
+(CJK, symbols, inline base64 noise) are counted as roughly one token each.
+"""
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text."""
+    if text.isascii():
+        return -(-len(text) // CHARS_PER_TOKEN)
+    units = sum(1 if ch.isascii() else CHARS_PER_TOKEN for ch in text)
+    return -(-units // CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text so that its estimated token count stays within max_tokens.
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token budget
+
+    Returns:
+        The longest prefix of text that fits the budget
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    if text.isascii():
+        return text[:budget]
+
+    used = 0
+    for i, ch in enumerate(text):
+        used += 1 if ch.isascii() else CHARS_PER_TOKEN
+        if used > budget:
+            return text[:i]
+    return text
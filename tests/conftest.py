@@ -0,0 +1,11 @@
+"""
+Shared pytest setup: dummy API keys and a throwaway cache database, applied before any app module is imported.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("GOOGLE_AI_API_KEY", "test-key")
+os.environ.setdefault("SERPAPI_API_KEY", "test-key")
+os.environ.setdefault("LLM_WARMUP", "false")
+os.environ["DB_FILE"] = os.path.join(tempfile.mkdtemp(prefix="lowest-price-tests-"), "cache.db")
@@ -0,0 +1,32 @@
+"""Tests for the SQLite-backed cache in app.core.cache."""
+
+import asyncio
+
+from app.core import cache
+
+
+def test_enhanced_query_is_served_from_memory_after_write():
+    async def scenario():
+        await cache.cache_enhanced_query("lg oled tv 65", "US", "LG OLED65 TV")
+        return await cache.get_enhanced_query("lg oled tv 65", "US")
+
+    hits_before = cache.get_memory_cache_stats()["enhanced_queries"]["hits"]
+
+    assert asyncio.run(scenario()) == "LG OLED65 TV"
+    assert cache.get_memory_cache_stats()["enhanced_queries"]["hits"] == hits_before + 1
+
+
+def test_enhanced_query_is_reloaded_from_sqlite():
+    async def scenario():
+        await cache.cache_enhanced_query("sony wh-1000xm5", "GB", "Sony WH-1000XM5 headphones")
+        cache._enhanced_queries_memory.clear()
+        first = await cache.get_enhanced_query("sony wh-1000xm5", "GB")
+        second = await cache.get_enhanced_query("sony wh-1000xm5", "GB")
+        return first, second
+
+    assert asyncio.run(scenario()) == ("Sony WH-1000XM5 headphones", "Sony WH-1000XM5 headphones")
+    assert cache.get_memory_cache_stats()["enhanced_queries"]["hits"] == 1
+
+
+def test_missing_enhanced_query_is_none():
+    assert asyncio.run(cache.get_enhanced_query("no such query", "US")) is None
@@ -0,0 +1,119 @@
+"""Tests for app.utils.html_cleaner."""
+
+import json
+
+from app.utils.html_cleaner import _marker_text, _parse_and_strip, prepare_html_for_llm, preprocess_html_for_llm
+from app.utils.token_truncate import estimate_tokens
+
+
+def test_marker_text_page_with_comment_and_no_main():
+    html = (
+        "<html><body><!-- header --><div id='product'>"
+        "<h1>Acme Widget</h1><span class='price'>$19.99</span>"
+        "</div><?php echo 1; ?></body></html>"
+    )
+
+    text = preprocess_html_for_llm(html)
+
+    assert "[MAIN PRODUCT TITLE]: Acme Widget" in text
+    assert "[PRICE HINT]: $19.99" in text
+
+
+def test_marker_text_falls_back_to_main_class():
+    root = _parse_and_strip(
+        "<html><body><!-- c --><div class='pdp'><h1>Acme Widget</h1><p>Only $5.00 today</p></div></body></html>"
+    )
+
+    assert "[PRICE CANDIDATE]: Only $5.00 today" in _marker_text(root)
+
+
+def test_marker_text_without_body_is_empty():
+    root = _parse_and_strip("<html><head><title>x</title></head></html>")
+
+    assert root is None or _marker_text(root) == ""
+
+
+def test_parse_and_strip_keeps_root_with_noise_class():
+    root = _parse_and_strip(
+        "<html class='carousel-enabled'><body><main><h1>Acme Widget</h1>"
+        "<div class='related-products'><span>$1.00</span></div><p>$19.99</p></main></body></html>"
+    )
+
+    assert root is not None and root.tag == "html"
+    assert "$1.00" not in root.text_content()
+    assert "$19.99" in root.text_content()
+
+
+def test_parse_and_strip_drops_scripts_and_navigation():
+    root = _parse_and_strip(
+        "<html><head><script>var price = '$5';</script></head>"
+        "<body><nav>Deals $2</nav><main><p>$19.99</p></main><footer>$3</footer></body></html>"
+    )
+
+    assert root.text_content().strip() == "$19.99"
+
+
+def test_parse_and_strip_empty_input():
+    assert _parse_and_strip("") is None
+
+
+def test_prepare_html_for_llm_survives_noise_root():
+    content, is_flat_json, _ = prepare_html_for_llm(
+        "<html id='related-root'><body><h1>Acme Widget</h1><span class='price'>$19.99</span></body></html>"
+    )
+
+    assert is_flat_json
+    assert "$19.99" in content
+
+
+def test_parse_and_strip_keeps_body_with_noise_class():
+    root = _parse_and_strip("<html><body class='has-carousel'><p>$19.99</p></body></html>")
+
+    assert "$19.99" in root.text_content()
+
+
+def test_prepare_html_for_llm_heading_ignores_footer_text():
+    _, _, heading = prepare_html_for_llm(
+        "<html><head><title>Acme Widget | Shop</title></head><body><h1>Acme Widget</h1>"
+        "<span class='price'>$19.99</span><div>Select your country</div></body></html>"
+    )
+
+    assert heading == "Acme Widget | Shop\nAcme Widget"
+
+
+def test_prepare_html_for_llm_heading_of_error_page():
+    _, _, heading = prepare_html_for_llm("<html><head><title>404 Not Found</title></head><body><p>$1</p></body></html>")
+
+    assert heading == "404 Not Found"
+
+
+def test_prepare_html_for_llm_flat_json_fits_budget_as_valid_json():
+    items = "".join(f"<li class='price'>Bundle {i}: ${i}.99 with extras</li>" for i in range(200))
+    content, is_flat_json, _ = prepare_html_for_llm(
+        f"<html><body><h1>Acme Widget</h1><ul>{items}</ul></body></html>", max_tokens=200
+    )
+
+    flat = json.loads(content)
+    assert is_flat_json
+    assert 0 < len(flat) < 200
+    assert estimate_tokens(content) <= 200
+
+
+def test_flat_json_keeps_the_price_when_names_fill_the_budget():
+    names = "".join(f"<div class='product-name'>Acme Widget variant number {i}</div>" for i in range(100))
+    content, is_flat_json, _ = prepare_html_for_llm(
+        f"<html><body><h1>Acme Widget</h1>{names}<span class='price'>$499</span></body></html>", max_tokens=300
+    )
+
+    assert is_flat_json
+    assert "$499" in json.loads(content).values()
+    assert estimate_tokens(content) <= 300
+
+
+def test_flat_json_falls_back_to_marker_text_when_no_price_fits():
+    content, is_flat_json, _ = prepare_html_for_llm(
+        "<html><body><h1>Acme Widget</h1><span class='price'>$499</span></body></html>", max_tokens=1
+    )
+
+    assert not is_flat_json
+    assert content != "{}"
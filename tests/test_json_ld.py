@@ -0,0 +1,44 @@
+"""Tests for app.utils.json_ld."""
+
+import json
+
+import pytest
+
+from app.utils.json_ld import _parse_price, extract_json_ld_product
+
+
+@pytest.mark.parametrize("value, expected", [
+    (19.99, 19.99),
+    (1299, 1299.0),
+    ("12.99", 12.99),
+    ("1,299.00", 1299.0),
+    ("1.299,00", 1299.0),
+    ("1.299", 1299.0),
+    ("1,299", 1299.0),
+    ("1.299.000", 1299000.0),
+    ("12,5", 12.5),
+    ("EUR 49,90", 49.9),
+    ("$1,299.", 1299.0),
+])
+def test_parse_price(value, expected):
+    assert _parse_price(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", [None, True, "", "call for price", {"value": 1}])
+def test_parse_price_rejects_non_prices(value):
+    assert _parse_price(value) is None
+
+
+def _page(offers) -> str:
+    data = {"@context": "https://schema.org", "@type": "Product", "name": "Acme  Widget", "offers": offers}
+    return f'<script type="application/ld+json">{json.dumps(data)}</script>'
+
+
+def test_null_price_falls_back_to_low_price():
+    product = extract_json_ld_product(_page({
+        "@type": "AggregateOffer", "price": None, "lowPrice": "1.299,00", "priceCurrency": "EUR",
+    }))
+
+    assert product["product_name"] == "Acme Widget"
+    assert product["price"] == 1299.0
+    assert product["currency"] == "EUR"
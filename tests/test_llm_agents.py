@@ -0,0 +1,96 @@
+"""Tests for the pure helpers in app.agents.llm_agents."""
+
+import asyncio
+
+from app.agents import llm_agents
+from app.agents.llm_agents import ProductInfoBatchTool, ProductInfoTool, _pick_best_window
+from app.utils.token_truncate import estimate_tokens
+
+_FILLER = "".join(f"Some unrelated footer text line number {i}\n" for i in range(300))
+
+
+def test_pick_best_window_keeps_markers_past_the_budget():
+    content = _FILLER + "[PRICE HINT]: $499.00\n[PRICE CANDIDATE]: Was $599.00\n" + _FILLER
+
+    window = _pick_best_window(content, max_tokens=500)
+
+    assert window.startswith("[PRICE HINT]: $499.00")
+    assert estimate_tokens(window) <= 500
+
+
+def test_pick_best_window_keeps_title_in_front_of_a_late_window():
+    content = "[MAIN PRODUCT TITLE]: Acme Widget\n" + _FILLER + "[PRICE HINT]: $499.00\n[PRICE HINT]: $19.99\n"
+
+    window = _pick_best_window(content, max_tokens=500)
+
+    assert window.startswith("[MAIN PRODUCT TITLE]: Acme Widget\n[PRICE HINT]: $499.00")
+    assert estimate_tokens(window) <= 500
+
+
+def test_pick_best_window_uses_prefix_when_it_holds_the_window():
+    content = "[MAIN PRODUCT TITLE]: Acme Widget\n[PRICE HINT]: $499.00\n" + _FILLER
+
+    window = _pick_best_window(content, max_tokens=500)
+
+    assert content.startswith(window)
+    assert "[PRICE HINT]: $499.00" in window
+
+
+def test_pick_best_window_short_content_is_untouched():
+    assert _pick_best_window("[PRICE HINT]: $1", max_tokens=500) == "[PRICE HINT]: $1"
+
+
+def _entry(page: int, **fields) -> dict:
+    return {"page": page, "product_name": f"Widget {page}", "price": 9.99, "currency": "USD",
+            "availability": "in-stock", **fields}
+
+
+def test_batch_tool_drops_only_invalid_entries():
+    batch = ProductInfoBatchTool.model_validate({"products": [_entry(1), _entry(2, price="call us"), _entry(3)]})
+
+    assert [p.page for p in batch.products] == [1, 3]
+    assert batch._rejected_pages == {2}
+
+
+def _fake_invoke(batch_products, calls):
+    async def fake_invoke(llm, prompt, tag, schema=None):
+        calls.append(tag)
+        if tag == "extract_from_html_batch":
+            return schema.model_validate({"products": batch_products})
+        return ProductInfoTool(product_name="Single", price=1.0, currency="USD", availability="in-stock")
+
+    return fake_invoke
+
+
+def test_extract_pages_retries_only_invalid_entries(monkeypatch):
+    pages = [(f"content {i}", f"site{i}.com", "widget") for i in (1, 2, 3)]
+    calls = []
+    # Page 2's entry is invalid; page 3 was left out on purpose
+    monkeypatch.setattr(llm_agents, "_cached_invoke", _fake_invoke([_entry(1), _entry(2, price=None)], calls))
+
+    results = asyncio.run(llm_agents._extract_pages(pages))
+
+    assert [r and r.product_name for r in results] == ["Widget 1", "Single", None]
+    assert calls == ["extract_from_html_batch", "extract_from_html"]
+
+
+def test_extract_pages_does_not_retry_pages_left_out(monkeypatch):
+    pages = [(f"content {i}", f"site{i}.com", "widget") for i in (1, 2, 3)]
+    calls = []
+    monkeypatch.setattr(llm_agents, "_cached_invoke", _fake_invoke([_entry(2)], calls))
+
+    results = asyncio.run(llm_agents._extract_pages(pages))
+
+    assert [r and r.product_name for r in results] == [None, "Widget 2", None]
+    assert calls == ["extract_from_html_batch"]
+
+
+def test_extract_pages_retries_unanswered_pages_after_a_misnumbered_entry(monkeypatch):
+    pages = [(f"content {i}", f"site{i}.com", "widget") for i in (1, 2)]
+    calls = []
+    monkeypatch.setattr(llm_agents, "_cached_invoke", _fake_invoke([_entry(1), _entry(7)], calls))
+
+    results = asyncio.run(llm_agents._extract_pages(pages))
+
+    assert [r.product_name for r in results] == ["Widget 1", "Single"]
+    assert calls == ["extract_from_html_batch", "extract_from_html"]
@@ -0,0 +1,48 @@
+"""Tests for app.utils.micro_batcher."""
+
+import asyncio
+
+from app.utils.micro_batcher import MicroBatcher
+
+
+def test_items_within_the_window_share_one_batch():
+    batches = []
+
+    async def handler(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(handler, max_batch_size=10, window_seconds=0.01)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+
+    assert asyncio.run(scenario()) == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+
+
+def test_full_batch_flushes_without_waiting():
+    batches = []
+
+    async def handler(items):
+        batches.append(items)
+        return items
+
+    async def scenario():
+        batcher = MicroBatcher(handler, max_batch_size=2, window_seconds=60)
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(4))), timeout=1)
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3]
+    assert batches == [[0, 1], [2, 3]]
+
+
+def test_handler_error_reaches_every_submitter():
+    async def handler(items):
+        raise RuntimeError("quota")
+
+    async def scenario():
+        batcher = MicroBatcher(handler, max_batch_size=10, window_seconds=0.01)
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert [str(r) for r in results] == ["quota", "quota"]
@@ -0,0 +1,38 @@
+"""Tests for app.utils.semantic_cache."""
+
+import pytest
+
+from app.utils import semantic_cache
+from app.utils.semantic_cache import semantic_get, semantic_set
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(semantic_cache, "_entries", {})
+
+
+def test_reorder_and_casing_hit():
+    semantic_set("q", "lg oled tv 65 inch", "LG OLED65 TV")
+
+    assert semantic_get("q", "LG  OLED TV, 65 inch", 0.85) == "LG OLED65 TV"
+
+
+@pytest.mark.parametrize("query", ["lg oled tv 65 inch stand", "lg oled tv 65 inch remote", "lg oled tv 55 inch", "lg oled tv"])
+def test_differing_token_misses(query):
+    semantic_set("q", "lg oled tv 65 inch", "LG OLED65 TV")
+
+    assert semantic_get("q", query, 0.85) is None
+
+
+def test_changed_price_late_in_page_misses():
+    page = "[MAIN PRODUCT TITLE]: Widget\n" + "filler text line\n" * 500
+    semantic_set("p", page + "[PRICE HINT]: $19.99", "cheap")
+
+    assert semantic_get("p", page + "[PRICE HINT]: $24.99", 0.9) is None
+    assert semantic_get("p", page + "[PRICE HINT]: $19.99", 0.9) == "cheap"
+
+
+def test_tags_are_separate():
+    semantic_set("a", "sony wh 1000xm5", "A")
+
+    assert semantic_get("b", "sony wh 1000xm5", 0.85) is None
@@ -0,0 +1,58 @@
+"""Tests for app.utils.single_flight."""
+
+import asyncio
+
+from app.utils import single_flight as sf
+
+
+def test_concurrent_callers_share_one_call():
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def scenario():
+        return await asyncio.gather(*(sf.single_flight("k", work) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["done"] * 5
+    assert calls == 1
+    assert not sf._inflight
+
+
+def test_work_survives_one_cancelled_caller():
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        first = asyncio.ensure_future(sf.single_flight("k", work))
+        second = asyncio.ensure_future(sf.single_flight("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_work_is_cancelled_when_every_caller_is_cancelled():
+    async def scenario():
+        stopped = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                stopped.set()
+                raise
+
+        callers = [asyncio.ensure_future(sf.single_flight("k", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.wait_for(stopped.wait(), timeout=1)
+        return "k" in sf._inflight
+
+    assert asyncio.run(scenario()) is False
@@ -0,0 +1,88 @@
+"""Tests for the result filtering helpers in app.core.workflow."""
+
+import pytest
+
+from app.core import workflow
+from app.models import ProductResult
+
+
+def _result(name: str, site: str = "amazon.com", availability: str = "in-stock") -> ProductResult:
+    return ProductResult(link="", price=1.0, currency="USD", product_name=name, site_name=site, availability=availability)
+
+
+@pytest.mark.parametrize("text", [
+    "Please complete the CAPTCHA",
+    "Verify you are human",
+    "Prove you're not a robot",
+])
+def test_captcha_re_matches_bot_walls(text):
+    assert workflow._CAPTCHA_RE.search(text)
+
+
+@pytest.mark.parametrize("text", [
+    "iRobot Roomba j7+ Self-Emptying Robot Vacuum",
+    "Automated Self-Cleaning Litter Box",
+    "Security Check Pro 4K Camera",
+])
+def test_captcha_re_ignores_product_names(text):
+    assert not workflow._CAPTCHA_RE.search(text)
+
+
+@pytest.fixture
+def captcha_domains(monkeypatch):
+    domains = workflow.TTLCache(maxsize=16, ttl=60)
+    monkeypatch.setattr(workflow, "_captcha_domains", domains)
+    return domains
+
+
+def test_weak_hint_in_product_name_is_kept(captcha_domains):
+    valid, captcha_sites = [], set()
+    tier_counts = {"tier1_success": 0, "tier2_success": 0}
+
+    workflow._record_result(("tier2_success", _result("iRobot Roomba Robot Vacuum")), valid, captcha_sites, tier_counts)
+    workflow._record_result(("tier2_success", _result("Automated Self-Cleaning Litter Box")), valid, captcha_sites,
+                            tier_counts)
+
+    assert [r.product_name for r in valid] == ["iRobot Roomba Robot Vacuum", "Automated Self-Cleaning Litter Box"]
+    assert tier_counts == {"tier1_success": 0, "tier2_success": 2}
+
+
+def test_weak_hint_in_availability_drops_only_the_result(captcha_domains):
+    valid, captcha_sites = [], set()
+    tier_counts = {"tier1_success": 0, "tier2_success": 0}
+
+    workflow._record_result(("tier2_success", _result("Access check", availability="Security check in progress")),
+                            valid, captcha_sites, tier_counts)
+    workflow._record_result(("tier2_success", _result("Roomba Combo j9+")), valid, captcha_sites, tier_counts)
+
+    assert [r.product_name for r in valid] == ["Roomba Combo j9+"]
+    assert tier_counts == {"tier1_success": 0, "tier2_success": 1}
+    assert not captcha_sites
+    assert captcha_domains.get("amazon.com") is None
+
+
+def test_captcha_page_blocks_the_domain(captcha_domains):
+    valid, captcha_sites = [], set()
+
+    tier_counts = {"tier1_success": 0, "tier2_success": 0}
+
+    workflow._record_result(("tier2_success", _result("Enter the characters you see below - captcha")), valid,
+                            captcha_sites, tier_counts)
+    workflow._record_result(("tier1_success", _result("Roomba Combo j9+")), valid, captcha_sites, tier_counts)
+
+    assert not valid
+    assert tier_counts == {"tier1_success": 0, "tier2_success": 0}
+    assert captcha_sites == {"amazon.com"}
+    assert captcha_domains.get("amazon.com") is True
+
+
+def test_unknown_and_missing_results_are_not_counted(captcha_domains):
+    valid, captcha_sites = [], set()
+    tier_counts = {"tier1_success": 0, "tier2_success": 0}
+
+    workflow._record_result(None, valid, captcha_sites, tier_counts)
+    workflow._record_result(("tier2_success", _result("unknown")), valid, captcha_sites, tier_counts)
+    workflow._record_result(("tier1_success", _result("Roomba Combo j9+")), valid, captcha_sites, tier_counts)
+
+    assert len(valid) == 1
+    assert tier_counts == {"tier1_success": 1, "tier2_success": 0}